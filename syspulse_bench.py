@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+import psutil
+
+from db_manager import (
+    DBManager, BatchWriter, LEGACY_INDEXES, PRAGMA_PROFILES, RAW_COLUMNS, resolve_pragmas
+)
+from reporter import Reporter, SUMMARY_METRICS
+from stats_collector import CpuSampler, ProcessSampler, StatsCollector, ProcfsCollector
+
+
+class ConnectPerCallDBManager(DBManager):
+    
+    @contextmanager
+    def writer(self):
+        conn = self.get_connection()
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+
+class UncachedStatsCollector(StatsCollector):
+    # Same sources and collect_all, but host facts are re-read every time
+    
+    def _collect_memory(self):
+        memory = self.get_memory_usage()
+        return {
+            'memory_percent': round(memory['percent'], 2),
+            'memory_used_gb': round(memory['used_gb'], 2),
+            'memory_total_gb': round(memory['total_gb'], 2)
+        }
+    
+    def _collect_disk(self):
+        disk = self.get_disk_usage()
+        return {
+            'disk_percent': round(disk['percent'], 2),
+            'disk_used_gb': round(disk['used_gb'], 2),
+            'disk_total_gb': round(disk['total_gb'], 2)
+        }
+    
+    def _collect_uptime(self):
+        return {'uptime_seconds': int(self.get_uptime_seconds())}
+
+
+def make_sample(i, start_ms=1735689600000):
+    cores = [(i * 7 + core * 13) % 100 for core in range(8)]
+    return {
+        'timestamp': start_ms + i * 1000,
+        'cpu_percent': (i * 7) % 100,
+        'memory_percent': 40 + (i % 30),
+        'memory_used_gb': 6.4,
+        'memory_total_gb': 16.0,
+        'disk_percent': 71.8,
+        'disk_used_gb': 143.6,
+        'disk_total_gb': 200.0,
+        'uptime_seconds': 86400 + i,
+        'network_latency_ms': 15.0 + (i % 10) if i % 50 else None,
+        'cpu_core_max': max(cores),
+        'cpu_per_core': cores
+    }
+
+
+@contextmanager
+def temp_db_path():
+    with tempfile.TemporaryDirectory() as tmp:
+        yield str(Path(tmp) / 'bench.db')
+
+
+def report_line(label, count, elapsed):
+    per_op_us = elapsed / count * 1e6 if count else 0.0
+    rate = count / elapsed if elapsed else 0.0
+    print(f"  {label:<36} {per_op_us:>10.1f} us/op  {rate:>10.0f} ops/s")
+
+
+def time_inserts(db_manager, rows):
+    start = time.perf_counter()
+    for i in range(rows):
+        db_manager.insert_stats(make_sample(i))
+    return time.perf_counter() - start
+
+
+def bench_insert(rows):
+    print(f"Per-insert latency ({rows} rows)")
+    
+    for profile in PRAGMA_PROFILES:
+        pragmas = resolve_pragmas(profile)
+        
+        with temp_db_path() as db_path:
+            with ConnectPerCallDBManager(db_path, pragmas=pragmas) as db_manager:
+                elapsed = time_inserts(db_manager, rows)
+            report_line(f"connect-per-call ({profile})", rows, elapsed)
+        
+        with temp_db_path() as db_path:
+            with DBManager(db_path, pragmas=pragmas) as db_manager:
+                elapsed = time_inserts(db_manager, rows)
+            report_line(f"persistent writer ({profile})", rows, elapsed)
+
+
+def bench_batch(rows):
+    print(f"Per-sample write cost, single-row vs batched ({rows} rows)")
+    
+    for profile in PRAGMA_PROFILES:
+        pragmas = resolve_pragmas(profile)
+        
+        for batch_size in (1, 10, 100):
+            with temp_db_path() as db_path:
+                with DBManager(db_path, pragmas=pragmas) as db_manager:
+                    batch_writer = BatchWriter(db_manager, max_size=batch_size, max_age=3600)
+                    start = time.perf_counter()
+                    for i in range(rows):
+                        batch_writer.add(make_sample(i))
+                    batch_writer.flush()
+                    elapsed = time.perf_counter() - start
+            report_line(f"batch_size={batch_size} ({profile})", rows, elapsed)
+
+
+def bench_indexes(rows):
+    print(f"Insert throughput per index set ({rows} rows)")
+    
+    index_sets = {
+        'timestamp only': (),
+        'timestamp + legacy metric indexes': LEGACY_INDEXES
+    }
+    
+    for label, extra_indexes in index_sets.items():
+        with temp_db_path() as db_path:
+            with DBManager(db_path) as db_manager:
+                with db_manager.writer() as conn:
+                    for index in extra_indexes:
+                        column = index[len('idx_'):]
+                        conn.execute(f"CREATE INDEX {index} ON system_stats({column})")
+                
+                elapsed = time_inserts(db_manager, rows)
+            report_line(label, rows, elapsed)
+
+
+def fill_db(db_manager, rows, chunk=10000):
+    for offset in range(0, rows, chunk):
+        db_manager.insert_many([make_sample(i) for i in range(offset, min(rows, offset + chunk))])
+
+
+def measure_peak(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def bench_stream(rows):
+    print(f"Full-history report, peak Python memory ({rows} rows)")
+    
+    reporter = Reporter()
+    
+    with temp_db_path() as db_path:
+        with DBManager(db_path) as db_manager:
+            fill_db(db_manager, rows)
+            
+            def materialized():
+                stats = db_manager.get_all_stats()
+                reporter.generate_csv(stats)
+            
+            def streamed():
+                with open(os.devnull, 'w') as out:
+                    reporter.stream_csv(out, db_manager.iter_stats(), RAW_COLUMNS)
+            
+            for label, func in (('fetchall + dict rows', materialized),
+                                ('iter_stats + fetchmany', streamed)):
+                elapsed, peak = measure_peak(func)
+                print(f"  {label:<36} {peak / 1024 / 1024:>8.2f} MiB peak  {elapsed:>8.3f} s")
+
+
+def bench_summary(rows):
+    print(f"Report summary, Python vs SQL aggregation ({rows} rows)")
+    
+    reporter = Reporter()
+    
+    with temp_db_path() as db_path:
+        with DBManager(db_path) as db_manager:
+            fill_db(db_manager, rows)
+            
+            def python_summary():
+                reporter._calculate_summary(db_manager.get_all_stats())
+            
+            def sql_summary():
+                db_manager.summarize(metrics=SUMMARY_METRICS)
+            
+            for label, func in (('fetch rows + Python aggregates', python_summary),
+                                ('DBManager.summarize', sql_summary)):
+                elapsed, peak = measure_peak(func)
+                print(f"  {label:<36} {peak / 1024 / 1024:>8.2f} MiB peak  {elapsed:>8.3f} s")
+
+
+def bench_cpu(rows):
+    print(f"CPU sampling cost per call ({rows} delta samples)")
+    
+    collector_rounds = 3
+    start = time.perf_counter()
+    for _ in range(collector_rounds):
+        psutil.cpu_percent(interval=0.5)
+    report_line('psutil.cpu_percent(interval=0.5)', collector_rounds, time.perf_counter() - start)
+    
+    sampler = CpuSampler()
+    sampler.sample()
+    start = time.perf_counter()
+    for _ in range(rows):
+        sampler.sample()
+    report_line('CpuSampler.sample (cpu_times delta)', rows, time.perf_counter() - start)
+
+
+def measure_collect(collector, rows):
+    # Latency is served from the prober's cache, as in the daemon
+    collector.start_background_probes()
+    collector.collect_all()
+    
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    for _ in range(rows):
+        collector.collect_all()
+    cpu_time = time.process_time() - cpu_start
+    elapsed = time.perf_counter() - start
+    
+    # Traced separately: tracemalloc would dominate the timings above
+    allocated = 0
+    tracemalloc.start()
+    for _ in range(rows):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        collector.collect_all()
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    
+    # Allocations still live after each sample: the sample itself plus
+    # anything the collector keeps, counted from snapshot statistics
+    samples = []
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    before = tracemalloc.take_snapshot().filter_traces(ignore)
+    for _ in range(rows):
+        samples.append(collector.collect_all())
+    after = tracemalloc.take_snapshot().filter_traces(ignore)
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'lineno') if stat.count_diff > 0)
+    
+    collector.close()
+    return elapsed, cpu_time, blocks / rows, allocated / rows
+
+
+def bench_collect(rows):
+    print(f"collect_all wall time, CPU time and allocation per sample ({rows} samples)")
+    
+    collectors = [('psutil, uncached host facts', UncachedStatsCollector),
+                  ('psutil, cached host facts', StatsCollector)]
+    if sys.platform.startswith('linux'):
+        collectors.append(('procfs pread', ProcfsCollector))
+    
+    for label, collector_class in collectors:
+        # Disk space on every sample too, so each collector does the same work
+        collector = collector_class(
+            ping_targets=[('127.0.0.1', 1)], latency_interval=3600,
+            source_intervals={'disk': 0}
+        )
+        elapsed, cpu_time, blocks, allocated = measure_collect(collector, rows)
+        print(f"  {label:<36} {elapsed / rows * 1e6:>10.1f} us/op  "
+              f"{cpu_time / rows * 1e6:>10.1f} us cpu/op  {blocks:>6.0f} allocs/op  "
+              f"{allocated:>8.0f} B peak/op")
+
+
+def bench_processes(rows):
+    rounds = max(1, rows // 100)
+    print(f"Top-N process sampling cost per tick ({rounds} ticks)")
+    
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for process in psutil.process_iter(['name', 'cpu_times', 'memory_info']):
+            process.info
+    report_line('process_iter attribute scan', rounds, time.perf_counter() - start)
+    
+    sampler = ProcessSampler(top_n=5)
+    sampler.sample()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        sampler.sample()
+    report_line('ProcessSampler (incremental table)', rounds, time.perf_counter() - start)
+
+
+BENCHMARKS = {
+    'insert': bench_insert,
+    'batch': bench_batch,
+    'indexes': bench_indexes,
+    'stream': bench_stream,
+    'summary': bench_summary,
+    'cpu': bench_cpu,
+    'collect': bench_collect,
+    'processes': bench_processes,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='SysPulse - storage and collection benchmarks'
+    )
+    parser.add_argument(
+        'benchmarks', nargs='*',
+        help=f"Benchmarks to run: {', '.join(BENCHMARKS)} (default: all)"
+    )
+    parser.add_argument(
+        '--rows', type=int, default=2000,
+        help='Number of rows/iterations per benchmark (default: 2000)'
+    )
+    
+    args = parser.parse_args()
+    
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    
+    for name in args.benchmarks or BENCHMARKS:
+        BENCHMARKS[name](args.rows)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import os
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from db_manager import BatchWriter, DBManager
+from stats_collector import CgroupReader, LatencyProber, MetricSource, percentile
+from syspulse_bench import make_sample, temp_db_path
+from syspulse_main import collect_once
+
+
+class DelayedProber(LatencyProber):
+    # A local connect completes in microseconds, so the delay is added
+    # inside the timed (and timeout-bounded) connect instead
+    
+    def __init__(self, targets, delay=0.0, **kwargs):
+        super().__init__(targets, **kwargs)
+        self.delay = delay
+    
+    async def open_connection(self, host, port):
+        await asyncio.sleep(self.delay)
+        return await super().open_connection(host, port)
+
+
+class LocalServer:
+    # asyncio TCP server on its own thread, so probe()'s asyncio.run
+    # can connect to it
+    
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        self.port = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+    
+    def __enter__(self):
+        self._thread.start()
+        self.ready.wait(5)
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(5)
+    
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        server = self.loop.run_until_complete(
+            asyncio.start_server(self._handle, '127.0.0.1', 0)
+        )
+        self.port = server.sockets[0].getsockname()[1]
+        self.ready.set()
+        self.loop.run_forever()
+        server.close()
+        self.loop.run_until_complete(server.wait_closed())
+        self.loop.close()
+    
+    async def _handle(self, reader, writer):
+        writer.close()
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def check_percentile():
+    values = list(range(1, 11))
+    assert percentile(values, 50) == 5
+    assert percentile(values, 95) == 10
+    assert percentile(values, 100) == 10
+    assert percentile([7.5], 50) == 7.5
+    assert percentile([], 50) is None
+
+
+def check_latency():
+    with LocalServer() as server:
+        target = ('127.0.0.1', server.port)
+        refused = ('127.0.0.1', closed_port())
+        
+        prober = DelayedProber([target, refused], delay=0.05, timeout=1, probes=4)
+        served, closed = prober.probe()
+        
+        assert served['target'] == f"127.0.0.1:{server.port}"
+        assert served['loss_rate'] == 0.0 and served['probes'] == 4
+        assert 50 <= served['p50_ms'] <= served['p95_ms'] < 1000, served
+        assert closed['loss_rate'] == 1.0, closed
+        assert closed['p50_ms'] is None and closed['p95_ms'] is None
+        
+        # Connects slower than the timeout count as lost
+        prober = DelayedProber([target], delay=0.3, timeout=0.1, probes=2)
+        slow, = prober.probe()
+        assert slow['loss_rate'] == 1.0 and slow['p50_ms'] is None, slow
+        
+        results, age = prober.latest()
+        assert results == [slow] and age is not None
+
+
+def write_files(root, files):
+    for name, content in files.items():
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+
+def check_cgroup():
+    with tempfile.TemporaryDirectory() as tmp:
+        cgroup_root = os.path.join(tmp, 'cgroup')
+        pressure_root = os.path.join(tmp, 'pressure')
+        self_cgroup = os.path.join(tmp, 'self_cgroup')
+        write_files(tmp, {
+            'cgroup/cgroup.controllers': 'cpu memory io\n',
+            'cgroup/app.slice/memory.current': f"{1024 ** 3}\n",
+            'cgroup/app.slice/memory.max': f"{4 * 1024 ** 3}\n",
+            'cgroup/app.slice/cpu.stat': 'usage_usec 900\nnr_periods 100\n'
+                                         'nr_throttled 10\nthrottled_usec 500000\n',
+            'pressure/cpu': 'some avg10=1.50 avg60=1.00 avg300=0.50 total=100\n',
+            'pressure/memory': 'some avg10=2.25 avg60=0.00 avg300=0.00 total=10\n'
+                               'full avg10=0.75 avg60=0.00 avg300=0.00 total=5\n',
+            'self_cgroup': '0::/app.slice\n'
+        })
+        
+        reader = CgroupReader(cgroup_root=cgroup_root, pressure_root=pressure_root,
+                              self_cgroup=self_cgroup)
+        assert reader.path == os.path.join(cgroup_root, 'app.slice'), reader.path
+        
+        stats = reader.sample()
+        assert stats['cgroup_memory_used_gb'] == 1.0
+        assert stats['cgroup_memory_limit_gb'] == 4.0
+        assert stats['cgroup_memory_percent'] == 25.0
+        # Throttling is a rate, so the first sample has no baseline
+        assert stats['cgroup_cpu_throttled_percent'] is None
+        assert stats['psi_cpu_some'] == 1.5
+        assert stats['psi_memory_some'] == 2.25 and stats['psi_memory_full'] == 0.75
+        # No io pressure file
+        assert stats['psi_io_some'] is None and stats['psi_io_full'] is None
+        
+        write_files(cgroup_root, {
+            'app.slice/cpu.stat': 'usage_usec 1900\nnr_periods 200\n'
+                                  'nr_throttled 30\nthrottled_usec 1500000\n',
+            'app.slice/memory.max': 'max\n'
+        })
+        stats = reader.sample()
+        assert stats['cgroup_cpu_throttled_percent'] == 20.0, stats
+        assert stats['cgroup_cpu_throttled_ms_per_s'] > 0
+        assert stats['cgroup_memory_limit_gb'] is None
+        assert stats['cgroup_memory_percent'] is None
+        
+        # Without a quota cpu.stat has no period counters
+        write_files(cgroup_root, {'app.slice/cpu.stat': 'usage_usec 2900\n'})
+        assert reader.sample()['cgroup_cpu_throttled_percent'] is None
+        
+        # cgroup v1 (no cgroup.controllers): every cgroup column is empty
+        os.remove(os.path.join(cgroup_root, 'cgroup.controllers'))
+        reader = CgroupReader(cgroup_root=cgroup_root, pressure_root=pressure_root,
+                              self_cgroup=self_cgroup)
+        stats = reader.sample()
+        assert reader.path is None
+        assert all(value is None for key, value in stats.items() if key.startswith('cgroup_'))
+
+
+class ReplayCollector:
+    
+    def __init__(self):
+        self.count = 0
+    
+    def collect_all(self):
+        self.count += 1
+        return make_sample(self.count)
+
+
+def check_batching():
+    collector = ReplayCollector()
+    
+    with temp_db_path() as db_path:
+        with DBManager(db_path) as db_manager:
+            # Size limit: samples stay buffered until batch_size is reached
+            batch_writer = BatchWriter(db_manager, max_size=3, max_age=300)
+            for _ in range(2):
+                collect_once(db_manager, collector, batch_writer)
+            assert len(batch_writer) == 2 and db_manager.get_stats_count() == 0
+            
+            collect_once(db_manager, collector, batch_writer)
+            assert len(batch_writer) == 0 and db_manager.get_stats_count() == 3
+            
+            # Age limit: the first sample after flush_interval flushes
+            batch_writer = BatchWriter(db_manager, max_size=100, max_age=0.2)
+            collect_once(db_manager, collector, batch_writer)
+            assert len(batch_writer) == 1 and db_manager.get_stats_count() == 3
+            
+            time.sleep(0.25)
+            collect_once(db_manager, collector, batch_writer)
+            assert len(batch_writer) == 0 and db_manager.get_stats_count() == 5
+
+
+class FlakySource:
+    
+    def __init__(self):
+        self.runs = 0
+        self.fail = False
+    
+    def __call__(self):
+        self.runs += 1
+        if self.fail:
+            raise OSError('source unavailable')
+        return {'value': self.runs, 'rows': [self.runs]}
+
+
+def run_source(source, now, executor):
+    future = source.start(now, executor)
+    if future is not None:
+        wait([future])
+    return source.poll()
+
+
+def check_sources():
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        for blocking in (False, True):
+            collect = FlakySource()
+            source = MetricSource('flaky', collect, rows=('rows',), blocking=blocking)
+            
+            assert run_source(source, 0, executor) == {'value': 1, 'rows': [1]} and not source.stale
+            
+            # A failed run keeps the last values (minus child rows) and is
+            # reported as stale instead of raising
+            collect.fail = True
+            assert run_source(source, 1, executor) == {'value': 1}, blocking
+            assert source.stale and isinstance(source.error, OSError)
+            
+            collect.fail = False
+            assert run_source(source, 2, executor) == {'value': 3, 'rows': [3]} and not source.stale
+
+
+CHECKS = {
+    'percentile': check_percentile,
+    'latency': check_latency,
+    'cgroup': check_cgroup,
+    'batching': check_batching,
+    'sources': check_sources,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='SysPulse - self-contained collector checks'
+    )
+    parser.add_argument(
+        'checks', nargs='*',
+        help=f"Checks to run: {', '.join(CHECKS)} (default: all)"
+    )
+    
+    args = parser.parse_args()
+    
+    unknown = [name for name in args.checks if name not in CHECKS]
+    if unknown:
+        parser.error(f"unknown check(s): {', '.join(unknown)}")
+    
+    failed = 0
+    for name in args.checks or CHECKS:
+        try:
+            CHECKS[name]()
+            print(f"  {name:<24} ok")
+        except AssertionError as e:
+            failed += 1
+            print(f"  {name:<24} FAILED {e}")
+    
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,142 +1,1310 @@
+import queue
+import re
 import sqlite3
+import struct
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+
+
+PRAGMA_PROFILES = {
+    'durable': {
+        'journal_mode': 'delete',
+        'synchronous': 'full',
+        'temp_store': 'default',
+        'cache_size': -2000,
+        'mmap_size': 0,
+        'wal_autocheckpoint': 1000,
+        'busy_timeout': 5000
+    },
+    'balanced': {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'temp_store': 'memory',
+        'cache_size': -16000,
+        'mmap_size': 268435456,
+        'wal_autocheckpoint': 1000,
+        'busy_timeout': 5000
+    }
+}
+
+DEFAULT_PRAGMA_PROFILE = 'balanced'
+
+PRAGMA_CHOICES = {
+    'journal_mode': ('delete', 'truncate', 'persist', 'wal'),
+    'synchronous': ('off', 'normal', 'full', 'extra'),
+    'temp_store': ('default', 'file', 'memory')
+}
+
+CONNECTION_PRAGMAS = ('synchronous', 'temp_store', 'cache_size', 'mmap_size', 'busy_timeout')
+
+SYSTEM_STATS_DDL = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp INTEGER NOT NULL,
+        cpu_percent REAL NOT NULL,
+        memory_percent REAL NOT NULL,
+        memory_used_gb REAL NOT NULL,
+        memory_total_gb REAL NOT NULL,
+        disk_percent REAL NOT NULL,
+        disk_used_gb REAL NOT NULL,
+        disk_total_gb REAL NOT NULL,
+        uptime_seconds INTEGER NOT NULL,
+        network_latency_ms REAL,
+        cpu_core_max REAL,
+        cpu_per_core BLOB,
+        disk_read_iops REAL,
+        disk_write_iops REAL,
+        disk_read_bps REAL,
+        disk_write_bps REAL,
+        net_recv_bps REAL,
+        net_sent_bps REAL,
+        cgroup_memory_used_gb REAL,
+        cgroup_memory_limit_gb REAL,
+        cgroup_memory_percent REAL,
+        cgroup_cpu_throttled_percent REAL,
+        cgroup_cpu_throttled_ms_per_s REAL,
+        psi_cpu_some REAL,
+        psi_memory_some REAL,
+        psi_memory_full REAL,
+        psi_io_some REAL,
+        psi_io_full REAL,
+        stale_sources TEXT,
+        schedule_jitter_ms REAL,
+        missed_ticks INTEGER,
+        sample_interval_ms INTEGER
+    )
+'''
+
+# Columns added after the first release; older tables gain them on startup
+ADDED_COLUMNS = {
+    'cpu_core_max': 'REAL',
+    'cpu_per_core': 'BLOB',
+    'disk_read_iops': 'REAL',
+    'disk_write_iops': 'REAL',
+    'disk_read_bps': 'REAL',
+    'disk_write_bps': 'REAL',
+    'net_recv_bps': 'REAL',
+    'net_sent_bps': 'REAL',
+    'cgroup_memory_used_gb': 'REAL',
+    'cgroup_memory_limit_gb': 'REAL',
+    'cgroup_memory_percent': 'REAL',
+    'cgroup_cpu_throttled_percent': 'REAL',
+    'cgroup_cpu_throttled_ms_per_s': 'REAL',
+    'psi_cpu_some': 'REAL',
+    'psi_memory_some': 'REAL',
+    'psi_memory_full': 'REAL',
+    'psi_io_some': 'REAL',
+    'psi_io_full': 'REAL',
+    'stale_sources': 'TEXT',
+    'schedule_jitter_ms': 'REAL',
+    'missed_ticks': 'INTEGER',
+    'sample_interval_ms': 'INTEGER'
+}
+
+# Per-sample detail rows keyed by the sample timestamp
+LATENCY_STATS_DDL = '''
+    CREATE TABLE IF NOT EXISTS latency_stats (
+        id INTEGER PRIMARY KEY,
+        timestamp INTEGER NOT NULL,
+        target TEXT NOT NULL,
+        p50_ms REAL,
+        p95_ms REAL,
+        loss_rate REAL NOT NULL,
+        probes INTEGER NOT NULL
+    )
+'''
+
+MOUNT_STATS_DDL = '''
+    CREATE TABLE IF NOT EXISTS mount_stats (
+        id INTEGER PRIMARY KEY,
+        timestamp INTEGER NOT NULL,
+        mountpoint TEXT NOT NULL,
+        device TEXT,
+        fstype TEXT,
+        total_gb REAL,
+        used_gb REAL,
+        percent REAL,
+        responsive INTEGER NOT NULL
+    )
+'''
+
+TOP_PROCESSES_DDL = '''
+    CREATE TABLE IF NOT EXISTS top_processes (
+        id INTEGER PRIMARY KEY,
+        timestamp INTEGER NOT NULL,
+        pid INTEGER NOT NULL,
+        name TEXT,
+        cpu_percent REAL NOT NULL,
+        rss_mb REAL NOT NULL,
+        rss_delta_mb REAL NOT NULL
+    )
+'''
+
+# One row per metric per persisted sample, aggregated from the in-memory
+# high-frequency buffer
+HIGHFREQ_STATS_DDL = '''
+    CREATE TABLE IF NOT EXISTS highfreq_stats (
+        id INTEGER PRIMARY KEY,
+        timestamp INTEGER NOT NULL,
+        metric TEXT NOT NULL,
+        samples INTEGER NOT NULL,
+        value_mean REAL NOT NULL,
+        value_min REAL NOT NULL,
+        value_max REAL NOT NULL,
+        value_p99 REAL NOT NULL,
+        value_last REAL NOT NULL
+    )
+'''
+
+PARTITIONS_DDL = '''
+    CREATE TABLE IF NOT EXISTS stats_partitions (
+        name TEXT PRIMARY KEY,
+        start_ms INTEGER NOT NULL,
+        end_ms INTEGER NOT NULL
+    )
+'''
+
+PARTITION_SCHEMES = ('none', 'day', 'week')
+
+ROLLUP_DDL = '''
+    CREATE TABLE IF NOT EXISTS stats_rollup (
+        resolution INTEGER NOT NULL,
+        bucket INTEGER NOT NULL,
+        metric TEXT NOT NULL,
+        sample_count INTEGER NOT NULL,
+        value_sum REAL NOT NULL,
+        value_sum_sq REAL NOT NULL,
+        value_min REAL NOT NULL,
+        value_max REAL NOT NULL,
+        weight_sum REAL NOT NULL DEFAULT 0,
+        weighted_sum REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (resolution, bucket, metric)
+    ) WITHOUT ROWID
+'''
+
+# Averages are weighted by the time each sample covers, so adaptive
+# sampling doesn't over-count busy periods. Samples recorded before
+# sample_interval_ms existed count as one default-interval sample each.
+DEFAULT_SAMPLE_INTERVAL_MS = 60000
+
+SAMPLE_WEIGHT = f"COALESCE(sample_interval_ms, {DEFAULT_SAMPLE_INTERVAL_MS})"
+
+# SQLite allows at most 500 terms in a compound SELECT
+MAX_UNION_ARMS = 400
+
+ROLLUP_RESOLUTIONS = {
+    '1m': 60,
+    '5m': 300,
+    '1h': 3600,
+    '1d': 86400
+}
+
+DEFAULT_ROLLUP_RETENTION_DAYS = {
+    '1m': 30,
+    '5m': 90,
+    '1h': 730,
+    '1d': 0
+}
+
+ROLLUP_METRICS = (
+    'cpu_percent', 'memory_percent', 'disk_percent', 'network_latency_ms', 'cpu_core_max',
+    'disk_read_iops', 'disk_write_iops', 'disk_read_bps', 'disk_write_bps',
+    'net_recv_bps', 'net_sent_bps', 'cgroup_memory_percent', 'cgroup_cpu_throttled_percent',
+    'psi_cpu_some', 'psi_memory_some', 'psi_io_some', 'schedule_jitter_ms'
+)
+
+# Child table -> (key holding a list of row dicts in a sample, DDL, columns)
+CHILD_TABLES = {
+    'latency_stats': (
+        'latency_targets', LATENCY_STATS_DDL,
+        ('target', 'p50_ms', 'p95_ms', 'loss_rate', 'probes')
+    ),
+    'mount_stats': (
+        'mounts', MOUNT_STATS_DDL,
+        ('mountpoint', 'device', 'fstype', 'total_gb', 'used_gb', 'percent', 'responsive')
+    ),
+    'top_processes': (
+        'top_processes', TOP_PROCESSES_DDL,
+        ('pid', 'name', 'cpu_percent', 'rss_mb', 'rss_delta_mb')
+    ),
+    'highfreq_stats': (
+        'highfreq', HIGHFREQ_STATS_DDL,
+        ('metric', 'samples', 'value_mean', 'value_min', 'value_max', 'value_p99', 'value_last')
+    )
+}
+
+LEGACY_INDEXES = ('idx_cpu_percent', 'idx_memory_percent', 'idx_disk_percent')
+
+# Raw-table queries are templates: {table} is system_stats or a partition
+QUERIES = {
+    'stats_range': '''
+        SELECT {columns} FROM {table}
+        WHERE timestamp >= ? AND timestamp < ?
+        ORDER BY timestamp {order}
+    ''',
+    'stats_count': 'SELECT COUNT(*) FROM {table}',
+    'stats_summary_arm': '''
+        SELECT {columns} FROM {table}
+        WHERE timestamp >= ? AND timestamp < ?
+    ''',
+    'rollup_summary': '''
+        SELECT metric, SUM(sample_count), SUM(weight_sum), SUM(weighted_sum),
+               MIN(value_min), MAX(value_max)
+        FROM stats_rollup
+        WHERE resolution = ? AND bucket >= ? AND bucket < ?
+        GROUP BY metric
+    ''',
+    'partitions_range': '''
+        SELECT name FROM stats_partitions
+        WHERE start_ms < ? AND end_ms > ?
+        ORDER BY start_ms DESC
+    ''',
+    'expired_partition': '''
+        SELECT name FROM stats_partitions
+        WHERE end_ms <= ?
+        ORDER BY start_ms LIMIT 1
+    ''',
+    'hot_core_samples': '''
+        SELECT cpu_per_core FROM {table}
+        WHERE timestamp >= ? AND timestamp < ? AND cpu_core_max >= ?
+    ''',
+    'latency_summary': '''
+        SELECT target, COUNT(*), AVG(p50_ms), MAX(p95_ms), AVG(loss_rate)
+        FROM latency_stats
+        WHERE timestamp >= ? AND timestamp < ?
+        GROUP BY target
+        ORDER BY target
+    ''',
+    'mount_summary': '''
+        SELECT mountpoint, COUNT(*), AVG(percent), MAX(percent), SUM(responsive = 0)
+        FROM mount_stats
+        WHERE timestamp >= ? AND timestamp < ?
+        GROUP BY mountpoint
+        ORDER BY mountpoint
+    ''',
+    'process_summary': '''
+        SELECT name, COUNT(*), AVG(cpu_percent), MAX(cpu_percent), MAX(rss_mb)
+        FROM top_processes
+        WHERE timestamp >= ? AND timestamp < ?
+        GROUP BY name
+        ORDER BY SUM(cpu_percent) DESC
+        LIMIT ?
+    ''',
+    'highfreq_summary': '''
+        SELECT metric, SUM(samples), SUM(value_mean * samples) / SUM(samples),
+               MIN(value_min), MAX(value_max), MAX(value_p99)
+        FROM highfreq_stats
+        WHERE timestamp >= ? AND timestamp < ?
+        GROUP BY metric
+        ORDER BY metric
+    ''',
+    'rollups_range': '''
+        SELECT bucket, metric, sample_count, value_sum, value_sum_sq, value_min, value_max,
+               weight_sum, weighted_sum
+        FROM stats_rollup
+        WHERE resolution = ? AND bucket >= ? AND bucket < ?
+        ORDER BY bucket DESC
+    ''',
+    'purge_raw_chunk': '''
+        DELETE FROM {table} WHERE id IN (
+            SELECT id FROM {table} WHERE timestamp < ? ORDER BY timestamp LIMIT ?
+        )
+    ''',
+    'purge_rollup_chunk': '''
+        DELETE FROM stats_rollup WHERE resolution = ? AND bucket <= (
+            SELECT MAX(bucket) FROM (
+                SELECT bucket FROM stats_rollup
+                WHERE resolution = ? AND bucket < ?
+                ORDER BY bucket LIMIT ?
+            )
+        )
+    '''
+}
+
+ROLLUP_MERGE = '''
+    ON CONFLICT (resolution, bucket, metric) DO UPDATE SET
+        sample_count = sample_count + excluded.sample_count,
+        value_sum = value_sum + excluded.value_sum,
+        value_sum_sq = value_sum_sq + excluded.value_sum_sq,
+        value_min = MIN(value_min, excluded.value_min),
+        value_max = MAX(value_max, excluded.value_max),
+        weight_sum = weight_sum + excluded.weight_sum,
+        weighted_sum = weighted_sum + excluded.weighted_sum
+'''
+
+ROLLUP_UPSERT = '''
+    INSERT INTO stats_rollup (
+        resolution, bucket, metric, sample_count,
+        value_sum, value_sum_sq, value_min, value_max, weight_sum, weighted_sum
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+''' + ROLLUP_MERGE
+
+
+STATS_COLUMNS = (
+    'timestamp', 'cpu_percent', 'memory_percent', 'memory_used_gb',
+    'memory_total_gb', 'disk_percent', 'disk_used_gb', 'disk_total_gb',
+    'uptime_seconds', 'network_latency_ms', 'cpu_core_max', 'cpu_per_core',
+    'disk_read_iops', 'disk_write_iops', 'disk_read_bps', 'disk_write_bps',
+    'net_recv_bps', 'net_sent_bps',
+    'cgroup_memory_used_gb', 'cgroup_memory_limit_gb', 'cgroup_memory_percent',
+    'cgroup_cpu_throttled_percent', 'cgroup_cpu_throttled_ms_per_s',
+    'psi_cpu_some', 'psi_memory_some', 'psi_memory_full', 'psi_io_some', 'psi_io_full',
+    'stale_sources', 'schedule_jitter_ms', 'missed_ticks', 'sample_interval_ms'
+)
+
+# Packed float32 arrays, decoded with unpack_floats() instead of being
+# returned as report columns
+BLOB_COLUMNS = ('cpu_per_core',)
+
+RAW_COLUMNS = ('id',) + tuple(column for column in STATS_COLUMNS if column not in BLOB_COLUMNS)
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+def pack_floats(values):
+    if values is None:
+        return None
+    return struct.pack(f"<{len(values)}f", *values)
+
+
+def unpack_floats(blob):
+    if blob is None:
+        return None
+    return list(struct.unpack(f"<{len(blob) // 4}f", blob))
+
+
+def to_epoch_ms(value):
+    if isinstance(value, (int, float)):
+        return int(value)
+    
+    value = str(value).strip()
+    if value.lstrip('-').isdigit():
+        return int(value)
+    
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.astimezone()
+    return int(dt.astimezone(timezone.utc).timestamp() * 1000)
+
+
+def partition_bounds(timestamp_ms, scheme):
+    day = datetime.fromtimestamp(timestamp_ms / 1000, timezone.utc).date()
+    
+    if scheme == 'week':
+        start, days, prefix = day - timedelta(days=day.weekday()), 7, 'w'
+    elif scheme == 'day':
+        start, days, prefix = day, 1, 'd'
+    else:
+        raise ValueError(f"Unknown partitioning scheme: {scheme}")
+    
+    start_ms = int(datetime(start.year, start.month, start.day, tzinfo=timezone.utc).timestamp() * 1000)
+    return f"system_stats_{prefix}{start:%Y%m%d}", start_ms, start_ms + days * 86400 * 1000
+
+
+def resolve_pragmas(profile=DEFAULT_PRAGMA_PROFILE, overrides=None):
+    if profile not in PRAGMA_PROFILES:
+        raise ValueError(f"Unknown database profile: {profile}")
+    
+    pragmas = dict(PRAGMA_PROFILES[profile])
+    
+    for name, value in (overrides or {}).items():
+        if name not in pragmas:
+            raise ValueError(f"Unsupported pragma: {name}")
+        if name in PRAGMA_CHOICES:
+            value = str(value).strip().lower()
+            if value not in PRAGMA_CHOICES[name]:
+                raise ValueError(f"Invalid value for {name}: {value}")
+        else:
+            value = int(value)
+        pragmas[name] = value
+    
+    return pragmas
 
 
 class DBManager:
     
-    def __init__(self, db_path='data/syspulse.db'):
+    def __init__(self, db_path='data/syspulse.db', read_pool_size=4, pragmas=None,
+                 partitioning='none'):
+        if partitioning not in PARTITION_SCHEMES:
+            raise ValueError(f"Unknown partitioning scheme: {partitioning}")
+        
         self.db_path = db_path
+        self.read_pool_size = max(1, read_pool_size)
+        self.pragmas = pragmas or resolve_pragmas()
+        self.partitioning = partitioning
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        self._partitions = set()
+        self._current_partition = None
+        
+        self._writer_conn = None
+        self._writer_lock = threading.RLock()
+        self._read_pool = queue.LifoQueue()
+        self._read_pool_lock = threading.Lock()
+        self._read_conn_count = 0
+        
         self.init_db()
     
-    def get_connection(self):
-        return sqlite3.connect(self.db_path)
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def get_connection(self, read_only=False):
+        if read_only:
+            uri = Path(self.db_path).resolve().as_uri() + '?mode=ro'
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        
+        for name in CONNECTION_PRAGMAS:
+            if name in self.pragmas:
+                conn.execute(f"PRAGMA {name} = {self.pragmas[name]}")
+        
+        return conn
+    
+    @contextmanager
+    def writer(self):
+        with self._writer_lock:
+            if self._writer_conn is None:
+                self._writer_conn = self.get_connection()
+            conn = self._writer_conn
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                # Including KeyboardInterrupt from Ctrl+C or SIGTERM, so the
+                # shared connection is never left mid-transaction
+                conn.rollback()
+                raise
+    
+    @contextmanager
+    def reader(self):
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            self._release_reader(conn)
+    
+    def _acquire_reader(self):
+        try:
+            return self._read_pool.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._read_pool_lock:
+            if self._read_conn_count < self.read_pool_size:
+                self._read_conn_count += 1
+                create = True
+            else:
+                create = False
+        
+        if not create:
+            return self._read_pool.get()
+        
+        try:
+            return self.get_connection(read_only=True)
+        except sqlite3.Error:
+            with self._read_pool_lock:
+                self._read_conn_count -= 1
+            raise
+    
+    def _release_reader(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._read_pool.put(conn)
+    
+    def close(self):
+        with self._writer_lock:
+            if self._writer_conn is not None:
+                self._writer_conn.close()
+                self._writer_conn = None
+        
+        with self._read_pool_lock:
+            while True:
+                try:
+                    conn = self._read_pool.get_nowait()
+                except queue.Empty:
+                    break
+                conn.close()
+                self._read_conn_count -= 1
     
     def init_db(self):
         schema_path = Path('schema.sql')
         
-        conn = self.get_connection()
+        with self.writer() as conn:
+            conn.execute(f"PRAGMA journal_mode = {self.pragmas['journal_mode']}")
+            conn.execute(f"PRAGMA wal_autocheckpoint = {self.pragmas['wal_autocheckpoint']}")
+            
+            if self._get_timestamp_type(conn) == 'TEXT':
+                conn.execute(ROLLUP_DDL)
+                conn.execute(PARTITIONS_DDL)
+                self._create_child_tables(conn)
+                self._ensure_columns(conn, 'system_stats')
+                self._ensure_rollup_weights(conn)
+            else:
+                self._create_schema(conn, schema_path)
+            
+            self._partitions = {
+                row[0] for row in conn.execute('SELECT name FROM stats_partitions')
+            }
+    
+    def _ensure_columns(self, conn, table):
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for column, column_type in ADDED_COLUMNS.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+    
+    def _ensure_rollup_weights(self, conn):
+        # Rollups written before time weighting keep their plain mean
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(stats_rollup)")}
+        if 'weight_sum' in existing:
+            return
+        
+        conn.execute("ALTER TABLE stats_rollup ADD COLUMN weight_sum REAL NOT NULL DEFAULT 0")
+        conn.execute("ALTER TABLE stats_rollup ADD COLUMN weighted_sum REAL NOT NULL DEFAULT 0")
+        conn.execute(
+            'UPDATE stats_rollup SET weight_sum = sample_count * ?, weighted_sum = value_sum * ?',
+            (DEFAULT_SAMPLE_INTERVAL_MS, DEFAULT_SAMPLE_INTERVAL_MS)
+        )
+    
+    def _create_schema(self, conn, schema_path):
         cursor = conn.cursor()
         
+        rollups_exist = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stats_rollup'"
+        ).fetchone() is not None
+        
         if schema_path.exists():
             with open(schema_path, 'r') as f:
                 schema = f.read()
             cursor.executescript(schema)
         else:
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS system_stats (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT NOT NULL,
-                    cpu_percent REAL NOT NULL,
-                    memory_percent REAL NOT NULL,
-                    memory_used_gb REAL NOT NULL,
-                    memory_total_gb REAL NOT NULL,
-                    disk_percent REAL NOT NULL,
-                    disk_used_gb REAL NOT NULL,
-                    disk_total_gb REAL NOT NULL,
-                    uptime_seconds INTEGER NOT NULL,
-                    network_latency_ms REAL
-                )
-            ''')
+            cursor.execute(SYSTEM_STATS_DDL.format(table='system_stats'))
             cursor.execute('''
                 CREATE INDEX IF NOT EXISTS idx_timestamp 
                 ON system_stats(timestamp)
             ''')
+            cursor.execute(ROLLUP_DDL)
+            cursor.execute(PARTITIONS_DDL)
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_partitions_start 
+                ON stats_partitions(start_ms)
+            ''')
+        
+        self._create_child_tables(conn)
         
-        conn.commit()
-        conn.close()
+        partitions = [row[0] for row in cursor.execute('SELECT name FROM stats_partitions')]
+        for table in ['system_stats'] + partitions:
+            self._ensure_columns(conn, table)
+        self._ensure_rollup_weights(conn)
+        
+        for index in LEGACY_INDEXES:
+            cursor.execute(f"DROP INDEX IF EXISTS {index}")
+        
+        if not rollups_exist:
+            self._rebuild_rollups(conn)
     
-    def insert_stats(self, stats):
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def _create_child_tables(self, conn):
+        for table, (_, ddl, _) in CHILD_TABLES.items():
+            conn.execute(ddl)
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_timestamp ON {table}(timestamp)")
+    
+    def _rebuild_rollups(self, conn, exclude=()):
+        conn.execute('DELETE FROM stats_rollup')
+        
+        for table in self._raw_tables(conn):
+            if table in exclude:
+                continue
+            for width in ROLLUP_RESOLUTIONS.values():
+                width_ms = width * 1000
+                for metric in ROLLUP_METRICS:
+                    conn.execute(f'''
+                        INSERT INTO stats_rollup (
+                            resolution, bucket, metric, sample_count,
+                            value_sum, value_sum_sq, value_min, value_max,
+                            weight_sum, weighted_sum
+                        )
+                        SELECT ?, (timestamp / ?) * ?, ?, COUNT({metric}),
+                               SUM({metric}), SUM({metric} * {metric}),
+                               MIN({metric}), MAX({metric}),
+                               SUM({SAMPLE_WEIGHT}), SUM({metric} * {SAMPLE_WEIGHT})
+                        FROM {table}
+                        WHERE {metric} IS NOT NULL
+                        GROUP BY timestamp / ?
+                        {ROLLUP_MERGE}
+                    ''', (width, width_ms, width_ms, metric, width_ms))
+    
+    def rebuild_rollups(self):
+        with self.writer() as conn:
+            self._rebuild_rollups(conn)
+    
+    def _get_timestamp_type(self, conn, table='system_stats'):
+        for row in conn.execute(f"PRAGMA table_info({table})"):
+            if row[1] == 'timestamp':
+                return row[2].upper()
+        return None
+    
+    def needs_migration(self):
+        with self.reader() as conn:
+            return self._get_timestamp_type(conn) == 'TEXT'
+    
+    def migrate_timestamps(self, batch_size=5000, progress=None):
+        if not self.needs_migration():
+            return 0
+        
+        columns = ', '.join(('id',) + STATS_COLUMNS)
+        placeholders = ', '.join('?' for _ in ('id',) + STATS_COLUMNS)
+        insert_sql = f"INSERT INTO system_stats_migrating ({columns}) VALUES ({placeholders})"
+        select_sql = f"SELECT {columns} FROM system_stats WHERE id > ? ORDER BY id LIMIT ?"
+        
+        with self.writer() as conn:
+            conn.execute(SYSTEM_STATS_DDL.format(table='system_stats_migrating'))
+            last_id = conn.execute(
+                'SELECT COALESCE(MAX(id), 0) FROM system_stats_migrating'
+            ).fetchone()[0]
+            
+            if last_id == 0:
+                # Rollups are rebuilt batch by batch below; partitions are
+                # already integer-keyed and can be rolled up once up front
+                self._rebuild_rollups(conn, exclude=('system_stats',))
         
-        cursor.execute('''
-            INSERT INTO system_stats (
-                timestamp, cpu_percent, memory_percent, memory_used_gb,
-                memory_total_gb, disk_percent, disk_used_gb, disk_total_gb,
-                uptime_seconds, network_latency_ms
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            stats['timestamp'],
-            stats['cpu_percent'],
-            stats['memory_percent'],
-            stats['memory_used_gb'],
-            stats['memory_total_gb'],
-            stats['disk_percent'],
-            stats['disk_used_gb'],
-            stats['disk_total_gb'],
-            stats['uptime_seconds'],
-            stats['network_latency_ms']
+        migrated = 0
+        
+        while True:
+            with self.writer() as conn:
+                rows = conn.execute(select_sql, (last_id, batch_size)).fetchall()
+                self._copy_legacy_rows(conn, insert_sql, rows)
+                
+                if len(rows) < batch_size:
+                    # Final chunk: swap tables in the same transaction as the
+                    # tail copy so rows inserted meanwhile are not lost. Keep
+                    # it to DROP/RENAME so writers don't hit busy_timeout.
+                    conn.execute('DROP TABLE system_stats')
+                    conn.execute('ALTER TABLE system_stats_migrating RENAME TO system_stats')
+                    migrated += len(rows)
+                    break
+            
+            last_id = rows[-1][0]
+            migrated += len(rows)
+            
+            if progress:
+                progress(migrated)
+        
+        # Recreates idx_timestamp, which went with the dropped table
+        with self.writer() as conn:
+            self._create_schema(conn, Path('schema.sql'))
+        
+        return migrated
+    
+    def _copy_legacy_rows(self, conn, insert_sql, rows):
+        converted = [self._convert_legacy_row(row) for row in rows]
+        conn.executemany(insert_sql, converted)
+        conn.executemany(ROLLUP_UPSERT, self._aggregate_rollups(
+            [dict(zip(('id',) + STATS_COLUMNS, row)) for row in converted]
         ))
+    
+    def _convert_legacy_row(self, row):
+        return (row[0], to_epoch_ms(row[1])) + tuple(row[2:])
+    
+    def insert_stats(self, stats):
+        self.insert_many([stats])
+    
+    def insert_many(self, stats_list):
+        if not stats_list:
+            return 0
         
-        conn.commit()
-        conn.close()
+        columns = ', '.join(STATS_COLUMNS)
+        placeholders = ', '.join('?' for _ in STATS_COLUMNS)
+        
+        if self.partitioning == 'none':
+            groups = {('system_stats', None, None): stats_list}
+        else:
+            groups = {}
+            for stats in stats_list:
+                groups.setdefault(self._route_partition(stats['timestamp']), []).append(stats)
+        
+        created = []
+        
+        with self.writer() as conn:
+            for (table, start_ms, end_ms), rows in groups.items():
+                if start_ms is not None and table not in self._partitions:
+                    self._create_partition(conn, table, start_ms, end_ms)
+                    created.append(table)
+                
+                conn.executemany(
+                    f"INSERT INTO {table} ({columns}) VALUES ({placeholders})",
+                    [self._row_values(stats) for stats in rows]
+                )
+            
+            for table, (key, _, child_columns) in CHILD_TABLES.items():
+                child_rows = [
+                    (stats['timestamp'],) + tuple(item.get(column) for column in child_columns)
+                    for stats in stats_list
+                    for item in stats.get(key) or ()
+                ]
+                if child_rows:
+                    conn.executemany(
+                        f"INSERT INTO {table} (timestamp, {', '.join(child_columns)}) "
+                        f"VALUES (?{', ?' * len(child_columns)})",
+                        child_rows
+                    )
+            
+            conn.executemany(ROLLUP_UPSERT, self._aggregate_rollups(stats_list))
+        
+        self._partitions.update(created)
+        
+        return len(stats_list)
     
-    def get_all_stats(self):
-        conn = self.get_connection()
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+    def _row_values(self, stats):
+        values = [stats.get(column) for column in STATS_COLUMNS]
+        for column in BLOB_COLUMNS:
+            index = STATS_COLUMNS.index(column)
+            if isinstance(values[index], (list, tuple)):
+                values[index] = pack_floats(values[index])
+        return values
+    
+    def _route_partition(self, timestamp):
+        current = self._current_partition
+        if current is None or not current[1] <= timestamp < current[2]:
+            current = self._current_partition = partition_bounds(timestamp, self.partitioning)
+        return current
+    
+    def _create_partition(self, conn, table, start_ms, end_ms):
+        conn.execute(SYSTEM_STATS_DDL.format(table=table))
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_timestamp ON {table}(timestamp)")
+        conn.execute(
+            'INSERT OR IGNORE INTO stats_partitions (name, start_ms, end_ms) VALUES (?, ?, ?)',
+            (table, start_ms, end_ms)
+        )
+    
+    def _raw_tables(self, conn, start_ms=0, end_ms=2 ** 62):
+        # Partitions newest first; rows written before partitioning was
+        # enabled stay in system_stats and are treated as the oldest.
+        partitions = [
+            row[0] for row in conn.execute(QUERIES['partitions_range'], (end_ms, start_ms))
+        ]
+        return partitions + ['system_stats']
+    
+    def iter_stats(self, start_ms=None, end_ms=None, columns=RAW_COLUMNS,
+                   batch_size=1000, descending=True):
+        unknown = [column for column in columns if column not in ('id',) + STATS_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        
+        start_ms = 0 if start_ms is None else start_ms
+        end_ms = 2 ** 62 if end_ms is None else end_ms
         
-        cursor.execute('SELECT * FROM system_stats ORDER BY timestamp DESC')
-        rows = cursor.fetchall()
+        with self.reader() as conn:
+            tables = self._raw_tables(conn, start_ms, end_ms)
+            if not descending:
+                tables.reverse()
+            
+            for table in tables:
+                cursor = conn.execute(
+                    QUERIES['stats_range'].format(
+                        columns=', '.join(columns),
+                        table=table,
+                        order='DESC' if descending else 'ASC'
+                    ),
+                    (start_ms, end_ms)
+                )
+                
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield from rows
+    
+    def _aggregate_rollups(self, stats_list):
+        buckets = {}
         
-        conn.close()
+        for stats in stats_list:
+            timestamp = stats['timestamp']
+            weight = stats.get('sample_interval_ms') or DEFAULT_SAMPLE_INTERVAL_MS
+            for width in ROLLUP_RESOLUTIONS.values():
+                bucket = timestamp - timestamp % (width * 1000)
+                for metric in ROLLUP_METRICS:
+                    value = stats.get(metric)
+                    if value is None:
+                        continue
+                    
+                    key = (width, bucket, metric)
+                    agg = buckets.get(key)
+                    if agg is None:
+                        buckets[key] = [1, value, value * value, value, value,
+                                        weight, value * weight]
+                    else:
+                        agg[0] += 1
+                        agg[1] += value
+                        agg[2] += value * value
+                        agg[3] = min(agg[3], value)
+                        agg[4] = max(agg[4], value)
+                        agg[5] += weight
+                        agg[6] += value * weight
         
-        return [dict(row) for row in rows]
+        return [key + tuple(agg) for key, agg in buckets.items()]
     
-    def get_stats_last_hours(self, hours):
-        cutoff = (datetime.now() - timedelta(hours=hours)).isoformat()
+    def get_all_stats(self, precision=None):
+        resolution = self.pick_resolution(precision)
+        if resolution:
+            return self.get_rollups(0, now_ms() + 1, resolution)
         
-        conn = self.get_connection()
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        return [dict(zip(RAW_COLUMNS, row)) for row in self.iter_stats()]
+    
+    def get_stats_last_hours(self, hours, precision=None):
+        cutoff = now_ms() - int(hours * 3600 * 1000)
         
-        cursor.execute('''
-            SELECT * FROM system_stats 
-            WHERE timestamp >= ? 
-            ORDER BY timestamp DESC
-        ''', (cutoff,))
-        rows = cursor.fetchall()
+        resolution = self.pick_resolution(precision)
+        if resolution:
+            return self.get_rollups(cutoff, now_ms() + 1, resolution)
         
-        conn.close()
+        return [dict(zip(RAW_COLUMNS, row)) for row in self.iter_stats(cutoff)]
+    
+    def pick_resolution(self, precision=None):
+        if not precision:
+            return None
+        
+        candidates = [width for width in ROLLUP_RESOLUTIONS.values() if width <= precision]
+        return max(candidates) if candidates else None
+    
+    def get_rollups(self, start_ms, end_ms, resolution):
+        start_ms -= start_ms % (resolution * 1000)
         
-        return [dict(row) for row in rows]
+        with self.reader() as conn:
+            rows = conn.execute(
+                QUERIES['rollups_range'], (resolution, start_ms, end_ms)
+            ).fetchall()
+        
+        buckets = {}
+        for (bucket, metric, count, value_sum, value_sum_sq, value_min, value_max,
+                weight_sum, weighted_sum) in rows:
+            record = buckets.get(bucket)
+            if record is None:
+                record = {'timestamp': bucket, 'resolution': resolution, 'samples': 0}
+                for name in ROLLUP_METRICS:
+                    record[name] = None
+                    record[f"{name}_min"] = None
+                    record[f"{name}_max"] = None
+                    record[f"{name}_stddev"] = None
+                    record[f"{name}_count"] = 0
+                    record[f"{name}_weight"] = 0
+                buckets[bucket] = record
+            
+            mean = value_sum / count
+            variance = max(0.0, value_sum_sq / count - mean * mean)
+            record[metric] = weighted_sum / weight_sum if weight_sum else mean
+            record[f"{metric}_min"] = value_min
+            record[f"{metric}_max"] = value_max
+            record[f"{metric}_stddev"] = variance ** 0.5
+            record[f"{metric}_count"] = count
+            record[f"{metric}_weight"] = weight_sum
+            record['samples'] = max(record['samples'], count)
+        
+        return list(buckets.values())
+    
+    def summarize(self, start_ms=None, end_ms=None, metrics=ROLLUP_METRICS, resolution=None):
+        if not isinstance(metrics, dict):
+            metrics = {metric: metric for metric in metrics}
+        
+        unknown = [column for column in metrics.values() if column not in RAW_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        
+        start_ms = 0 if start_ms is None else start_ms
+        end_ms = 2 ** 62 if end_ms is None else end_ms
+        
+        if resolution:
+            return self._summarize_rollups(start_ms, end_ms, metrics, resolution)
+        
+        columns = list(dict.fromkeys(metrics.values()))
+        aggregates = ', '.join(
+            f"SUM({c} * {SAMPLE_WEIGHT}), SUM(CASE WHEN {c} IS NOT NULL THEN {SAMPLE_WEIGHT} END), "
+            f"MIN({c}), MAX({c})"
+            for c in columns
+        )
+        arm_columns = ', '.join(dict.fromkeys(columns + ['sample_interval_ms']))
+        
+        # Partial aggregates per group of partitions, since SQLite caps a
+        # compound SELECT at 500 arms
+        total_records = 0
+        partials = {column: [0.0, 0, None, None] for column in columns}
+        
+        with self.reader() as conn:
+            tables = self._raw_tables(conn, start_ms, end_ms)
+            for offset in range(0, len(tables), MAX_UNION_ARMS):
+                chunk = tables[offset:offset + MAX_UNION_ARMS]
+                union = ' UNION ALL '.join(
+                    QUERIES['stats_summary_arm'].format(columns=arm_columns, table=table)
+                    for table in chunk
+                )
+                row = conn.execute(
+                    f"SELECT COUNT(*), {aggregates} FROM ({union})",
+                    (start_ms, end_ms) * len(chunk)
+                ).fetchone()
+                
+                total_records += row[0]
+                for i, column in enumerate(columns):
+                    weighted, weight, low, high = row[1 + i * 4:5 + i * 4]
+                    if weight is None:
+                        continue
+                    
+                    partial = partials[column]
+                    partial[0] += weighted
+                    partial[1] += weight
+                    partial[2] = low if partial[2] is None else min(partial[2], low)
+                    partial[3] = high if partial[3] is None else max(partial[3], high)
+        
+        results = {
+            column: {
+                'avg': weighted / weight if weight else None,
+                'min': low,
+                'max': high
+            }
+            for column, (weighted, weight, low, high) in partials.items()
+        }
+        
+        return {label: results[column] for label, column in metrics.items()}, total_records
+    
+    def _summarize_rollups(self, start_ms, end_ms, metrics, resolution):
+        start_ms -= start_ms % (resolution * 1000)
+        
+        with self.reader() as conn:
+            rows = conn.execute(
+                QUERIES['rollup_summary'], (resolution, start_ms, end_ms)
+            ).fetchall()
+        
+        results = {
+            metric: {
+                'avg': weighted_sum / weight_sum if weight_sum else None,
+                'min': value_min, 'max': value_max, 'count': count
+            }
+            for metric, count, weight_sum, weighted_sum, value_min, value_max in rows
+        }
+        empty = {'avg': None, 'min': None, 'max': None, 'count': 0}
+        
+        summary = {}
+        total_records = 0
+        for label, column in metrics.items():
+            result = results.get(column, empty)
+            summary[label] = {key: result[key] for key in ('avg', 'min', 'max')}
+            total_records = max(total_records, result['count'])
+        
+        return summary, total_records
+    
+    def hot_cores(self, start_ms=None, end_ms=None, threshold=90.0):
+        # cpu_core_max filters in SQL so only samples with a hot core
+        # have their per-core array decoded
+        start_ms = 0 if start_ms is None else start_ms
+        end_ms = 2 ** 62 if end_ms is None else end_ms
+        
+        counts = {}
+        
+        with self.reader() as conn:
+            for table in self._raw_tables(conn, start_ms, end_ms):
+                cursor = conn.execute(
+                    QUERIES['hot_core_samples'].format(table=table),
+                    (start_ms, end_ms, threshold)
+                )
+                for (blob,) in cursor:
+                    for core, value in enumerate(unpack_floats(blob) or ()):
+                        if value >= threshold:
+                            counts[core] = counts.get(core, 0) + 1
+        
+        return dict(sorted(counts.items(), key=lambda item: item[1], reverse=True))
+    
+    def summarize_latency(self, start_ms=None, end_ms=None):
+        start_ms = 0 if start_ms is None else start_ms
+        end_ms = 2 ** 62 if end_ms is None else end_ms
+        
+        with self.reader() as conn:
+            rows = conn.execute(QUERIES['latency_summary'], (start_ms, end_ms)).fetchall()
+        
+        return {
+            target: {'cycles': cycles, 'p50_ms': p50, 'p95_ms': p95, 'loss_rate': loss_rate}
+            for target, cycles, p50, p95, loss_rate in rows
+        }
+    
+    def summarize_mounts(self, start_ms=None, end_ms=None):
+        start_ms = 0 if start_ms is None else start_ms
+        end_ms = 2 ** 62 if end_ms is None else end_ms
+        
+        with self.reader() as conn:
+            rows = conn.execute(QUERIES['mount_summary'], (start_ms, end_ms)).fetchall()
+        
+        return {
+            mountpoint: {'samples': samples, 'avg': avg, 'max': high, 'unresponsive': unresponsive}
+            for mountpoint, samples, avg, high, unresponsive in rows
+        }
+    
+    def summarize_processes(self, start_ms=None, end_ms=None, limit=10):
+        start_ms = 0 if start_ms is None else start_ms
+        end_ms = 2 ** 62 if end_ms is None else end_ms
+        
+        with self.reader() as conn:
+            rows = conn.execute(
+                QUERIES['process_summary'], (start_ms, end_ms, limit)
+            ).fetchall()
+        
+        return {
+            name: {'intervals': intervals, 'avg_cpu': avg_cpu, 'max_cpu': max_cpu, 'max_rss_mb': max_rss}
+            for name, intervals, avg_cpu, max_cpu, max_rss in rows
+        }
+    
+    def summarize_highfreq(self, start_ms=None, end_ms=None):
+        # max_p99 is the worst single persistence interval
+        start_ms = 0 if start_ms is None else start_ms
+        end_ms = 2 ** 62 if end_ms is None else end_ms
+        
+        with self.reader() as conn:
+            rows = conn.execute(QUERIES['highfreq_summary'], (start_ms, end_ms)).fetchall()
+        
+        return {
+            metric: {'samples': samples, 'avg': avg, 'min': low, 'max': high, 'max_p99': p99}
+            for metric, samples, avg, low, high, p99 in rows
+        }
     
     def get_stats_last_24h(self):
         return self.get_stats_last_hours(24)
     
     def delete_old_stats(self, days):
-        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+        cutoff = now_ms() - int(days * 86400 * 1000)
         
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        deleted = 0
+        more = True
+        while more:
+            count, more = self.purge_chunk('raw', cutoff, 10000)
+            deleted += count
+        
+        return deleted
+    
+    def purge_chunk(self, tier, cutoff_ms, limit):
+        if tier != 'raw':
+            with self.writer() as conn:
+                deleted = conn.execute(
+                    QUERIES['purge_rollup_chunk'], (tier, tier, cutoff_ms, limit)
+                ).rowcount
+            return deleted, deleted > 0
         
-        cursor.execute('DELETE FROM system_stats WHERE timestamp < ?', (cutoff,))
-        deleted = cursor.rowcount
+        with self.writer() as conn:
+            expired = conn.execute(QUERIES['expired_partition'], (cutoff_ms,)).fetchone()
+            
+            if expired:
+                table = expired[0]
+                deleted = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+                conn.execute('DELETE FROM stats_partitions WHERE name = ?', (table,))
+                more = True
+            else:
+                deleted = conn.execute(
+                    QUERIES['purge_raw_chunk'].format(table='system_stats'), (cutoff_ms, limit)
+                ).rowcount
+                more = deleted >= limit
+            
+            # Child tables are not partitioned and always purge by row
+            for child in CHILD_TABLES:
+                count = conn.execute(
+                    QUERIES['purge_raw_chunk'].format(table=child), (cutoff_ms, limit)
+                ).rowcount
+                deleted += count
+                more = more or count >= limit
         
-        conn.commit()
-        conn.close()
+        if expired:
+            self._partitions.discard(table)
         
-        return deleted
+        return deleted, more
     
-    def get_stats_count(self):
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def checkpoint(self, mode='PASSIVE'):
+        if mode not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+            raise ValueError(f"Invalid checkpoint mode: {mode}")
+        if self.pragmas['journal_mode'] != 'wal':
+            return None
+        
+        with self.writer() as conn:
+            busy, wal_pages, checkpointed = conn.execute(
+                f"PRAGMA wal_checkpoint({mode})"
+            ).fetchone()
+        
+        return {'busy': bool(busy), 'wal_pages': wal_pages, 'checkpointed': checkpointed}
+    
+    def explain_queries(self):
+        plans = {}
+        
+        with self.reader() as conn:
+            for name, sql in QUERIES.items():
+                sql = sql.format(table='system_stats', columns='*', order='DESC')
+                params = (now_ms(),) * sql.count('?')
+                rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+                plans[name] = [row[-1] for row in rows]
         
-        cursor.execute('SELECT COUNT(*) FROM system_stats')
-        count = cursor.fetchone()[0]
+        return plans
+    
+    def advise_indexes(self):
+        with self.reader() as conn:
+            # Partition indexes mirror idx_timestamp on system_stats
+            indexes = [
+                row[0] for row in conn.execute('''
+                    SELECT name FROM sqlite_master
+                    WHERE type = 'index' AND sql IS NOT NULL
+                      AND tbl_name NOT IN (SELECT name FROM stats_partitions)
+                ''')
+            ]
+        
+        plans = self.explain_queries()
+        used = set()
+        missing = []
+        
+        for name, details in plans.items():
+            sql = QUERIES[name]
+            filtered = 'WHERE' in sql or 'ORDER BY' in sql
+            
+            for detail in details:
+                match = re.search(r'USING (?:COVERING )?INDEX (\w+)', detail)
+                if match:
+                    # An unfiltered full scan picks whichever index is
+                    # narrowest, which says nothing about access paths.
+                    if filtered or not detail.startswith('SCAN'):
+                        used.add(match.group(1))
+                elif filtered and re.match(r'SCAN \w+$', detail):
+                    missing.append((name, detail))
+                elif 'USE TEMP B-TREE' in detail:
+                    missing.append((name, detail))
         
-        conn.close()
+        return {
+            'plans': plans,
+            'used': sorted(used),
+            'unused': sorted(index for index in indexes if index not in used),
+            'missing': missing
+        }
+    
+    def get_stats_count(self):
+        with self.reader() as conn:
+            count = sum(
+                conn.execute(QUERIES['stats_count'].format(table=table)).fetchone()[0]
+                for table in self._raw_tables(conn)
+            )
         
         return count
 
 
+class BatchWriter:
+    
+    def __init__(self, db_manager, max_size=100, max_age=300):
+        self.db_manager = db_manager
+        self.max_size = max(1, max_size)
+        self.max_age = max(0, max_age)
+        
+        self._buffer = []
+        self._oldest = None
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._buffer)
+    
+    def add(self, stats):
+        with self._lock:
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.append(stats)
+        
+        if self.is_due():
+            self.flush()
+    
+    def is_due(self):
+        return self.seconds_until_due() == 0
+    
+    def seconds_until_due(self):
+        with self._lock:
+            if not self._buffer:
+                return None
+            if len(self._buffer) >= self.max_size:
+                return 0
+            return max(0, self.max_age - (time.monotonic() - self._oldest))
+    
+    def flush_if_due(self):
+        if self.is_due():
+            return self.flush()
+        return 0
+    
+    def flush(self):
+        with self._lock:
+            batch, oldest = self._buffer, self._oldest
+            self._buffer, self._oldest = [], None
+        
+        if not batch:
+            return 0
+        
+        try:
+            return self.db_manager.insert_many(batch)
+        except BaseException:
+            # An interrupted flush keeps its samples for the final flush
+            with self._lock:
+                self._buffer = batch + self._buffer
+                self._oldest = oldest
+            raise
+
+
+class RetentionManager:
+    
+    def __init__(self, db_manager, policy, chunk_size=500, interval=300,
+                 time_budget=0.5, chunk_pause=0.05):
+        self.db_manager = db_manager
+        self.policy = policy
+        self.chunk_size = max(1, chunk_size)
+        self.interval = interval
+        self.time_budget = time_budget
+        self.chunk_pause = chunk_pause
+        
+        self._pending = []
+        self._last_pass = None
+    
+    def run_pending(self):
+        now = time.monotonic()
+        
+        if not self._pending:
+            if self._last_pass is not None and now - self._last_pass < self.interval:
+                return 0
+            self._last_pass = now
+            self._pending = self._plan()
+        
+        deadline = now + self.time_budget
+        deleted = 0
+        
+        while self._pending:
+            tier, cutoff = self._pending[0]
+            count, more = self.db_manager.purge_chunk(tier, cutoff, self.chunk_size)
+            deleted += count
+            
+            if not more:
+                self._pending.pop(0)
+            
+            if time.monotonic() + self.chunk_pause >= deadline:
+                break
+            if self.chunk_pause:
+                time.sleep(self.chunk_pause)
+        
+        return deleted
+    
+    def _plan(self):
+        now = now_ms()
+        return [
+            (tier, now - int(seconds * 1000))
+            for tier, seconds in self.policy.items()
+            if seconds
+        ]
+
+
 if __name__ == '__main__':
     db = DBManager('data/test_syspulse.db')
     
     test_stats = {
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': now_ms(),
         'cpu_percent': 45.5,
         'memory_percent': 62.3,
         'memory_used_gb': 10.5,
@@ -155,6 +1323,8 @@ if __name__ == '__main__':
     if stats:
         print(f"\nLatest record:")
         latest = stats[0]
-        print(f"  Timestamp: {latest['timestamp']}")
+        print(f"  Timestamp: {datetime.fromtimestamp(latest['timestamp'] / 1000).isoformat()}")
         print(f"  CPU: {latest['cpu_percent']}%")
         print(f"  Memory: {latest['memory_percent']}%")
+    
+    db.close()
@@ -1,14 +1,19 @@
 #!/usr/bin/env python3
 import argparse
 import configparser
+import signal
 import sys
 import time
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime, timedelta
 
-from stats_collector import StatsCollector
-from db_manager import DBManager
-from reporter import Reporter
+from stats_collector import DEFAULT_MOUNT_FSTYPES_EXCLUDE, create_collector
+from db_manager import (
+    DBManager, BatchWriter, RetentionManager, PRAGMA_PROFILES, DEFAULT_PRAGMA_PROFILE,
+    ROLLUP_RESOLUTIONS, DEFAULT_ROLLUP_RETENTION_DAYS, RAW_COLUMNS, now_ms, resolve_pragmas
+)
+from reporter import Reporter, SUMMARY_METRICS
 from notifier import Notifier
 
 
@@ -21,66 +26,420 @@ def load_config(config_path='config.ini'):
     return config
 
 
-def collect_once(db_manager, collector):
+def get_db_settings(config):
+    if not config or not config.has_section('database'):
+        config = configparser.ConfigParser()
+        config.add_section('database')
+    
+    section = config['database']
+    profile = section.get('profile', DEFAULT_PRAGMA_PROFILE)
+    overrides = {
+        name: section[name]
+        for name in PRAGMA_PROFILES[DEFAULT_PRAGMA_PROFILE]
+        if name in section
+    }
+    
+    return {
+        'path': section.get('path', 'data/syspulse.db'),
+        'pragmas': resolve_pragmas(profile, overrides),
+        'checkpoint_interval': section.getint('checkpoint_interval', 300),
+        'batch_size': section.getint('batch_size', 1),
+        'flush_interval': section.getint('flush_interval', 0),
+        'partitioning': section.get('partitioning', 'none')
+    }
+
+
+def get_retention_settings(config):
+    if not config or not config.has_section('maintenance'):
+        config = configparser.ConfigParser()
+        config.add_section('maintenance')
+    
+    section = config['maintenance']
+    
+    raw_hours = section.getfloat('raw_retention_hours')
+    if raw_hours is None:
+        raw_hours = section.getfloat('retention_days', 2) * 24
+    
+    policy = {'raw': raw_hours * 3600}
+    for label, width in ROLLUP_RESOLUTIONS.items():
+        days = section.getfloat(f"rollup_{label}_retention_days", DEFAULT_ROLLUP_RETENTION_DAYS[label])
+        policy[width] = days * 86400
+    
+    return {
+        'policy': policy,
+        'chunk_size': section.getint('purge_chunk_size', 500),
+        'interval': section.getint('purge_interval', 300),
+        'time_budget': section.getfloat('purge_time_budget', 0.5),
+        'chunk_pause': section.getfloat('purge_chunk_pause', 0.05)
+    }
+
+
+def get_adaptive_settings(config):
+    # None unless [collection] adaptive is enabled
+    if not config or not config.has_section('collection'):
+        return None
+    
+    section = config['collection']
+    if not section.getboolean('adaptive', False):
+        return None
+    
+    return {
+        'min_interval': section.getfloat('min_interval', 5),
+        'max_interval': section.getfloat('max_interval', 60),
+        'cpu_threshold': section.getfloat('cpu_delta_threshold', 10),
+        'memory_threshold': section.getfloat('memory_delta_threshold', 5)
+    }
+
+
+def split_list(value, exclude=()):
+    items = (item.strip() for item in value.split(','))
+    return [item for item in items if item and item not in exclude]
+
+
+def get_collection_settings(config):
+    if not config or not config.has_section('collection'):
+        config = configparser.ConfigParser()
+        config.add_section('collection')
+    
+    section = config['collection']
+    ping_host = section.get('ping_host', '8.8.8.8')
+    ping_port = section.getint('ping_port', 53)
+    
+    cgroup_path = section.get('cgroup_path', 'auto')
+    
+    ping_targets = []
+    for target in split_list(section.get('ping_targets', '')):
+        host, _, port = target.rpartition(':')
+        if not host or not port.isdigit():
+            host, port = target, ping_port
+        ping_targets.append((host.strip('[]'), int(port)))
+    
+    source_intervals = {}
+    if config.has_section('sources'):
+        for name in config['sources']:
+            source_intervals[name] = config['sources'].getfloat(name)
+    
+    return {
+        'backend': section.get('backend', 'auto'),
+        'ping_host': ping_host,
+        'ping_port': ping_port,
+        'ping_targets': ping_targets,
+        'probes_per_target': section.getint('probes_per_target', 3),
+        'facts_check_interval': section.getfloat('facts_check_interval', 300),
+        'mounts': split_list(section.get('mounts', 'auto'), exclude=('auto',)),
+        'mount_fstypes_exclude': split_list(
+            section.get('mount_fstypes_exclude', ', '.join(DEFAULT_MOUNT_FSTYPES_EXCLUDE))
+        ),
+        'mount_refresh_interval': section.getfloat('mount_refresh_interval', 300),
+        'mount_timeout': section.getfloat('mount_timeout', 2),
+        'top_processes': section.getint('top_processes', 5),
+        'process_interval': section.getfloat('process_interval', 60),
+        'cgroup_path': None if cgroup_path == 'auto' else cgroup_path,
+        'cgroup_root': section.get('cgroup_root', '/sys/fs/cgroup'),
+        'pressure_root': section.get('pressure_root', '/proc/pressure'),
+        'latency_interval': section.getfloat('latency_interval', 15),
+        'latency_timeout': section.getfloat('latency_timeout', 5),
+        'source_intervals': source_intervals,
+        'source_workers': section.getint('source_workers', 4),
+        'source_deadline': section.getfloat('source_deadline', 2),
+        'highfreq_rate': section.getfloat('highfreq_rate', 0),
+        'highfreq_buffer_seconds': section.getfloat('highfreq_buffer_seconds', 600)
+    }
+
+
+def open_db(db_settings, check_migration=True):
+    db_manager = DBManager(
+        db_settings['path'],
+        pragmas=db_settings['pragmas'],
+        partitioning=db_settings['partitioning']
+    )
+    if check_migration and db_manager.needs_migration():
+        # Epoch-millisecond cutoffs compare as strings against text
+        # timestamps, so ranges, summaries and purges would all be wrong
+        db_manager.close()
+        print("Error: database uses legacy text timestamps, "
+              "run 'syspulse_main.py migrate' to convert it first")
+        sys.exit(1)
+    return db_manager
+
+
+def collect_once(db_manager, collector, batch_writer=None, scheduler=None):
     stats = collector.collect_all()
-    db_manager.insert_stats(stats)
+    if scheduler is not None:
+        stats.update(scheduler.metrics())
+    if batch_writer is not None:
+        batch_writer.add(stats)
+    else:
+        db_manager.insert_stats(stats)
     print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Stats collected")
     return stats
 
 
-def run_daemon(interval, db_path, notify_enabled, notify_config):
-    db_manager = DBManager(db_path)
-    collector = StatsCollector()
+def sleep_with_flush(deadline, batch_writer):
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        
+        due_in = batch_writer.seconds_until_due()
+        if due_in is not None and due_in < remaining:
+            time.sleep(due_in)
+            batch_writer.flush_if_due()
+        else:
+            time.sleep(remaining)
+
+
+class TickScheduler:
+    # Ticks fall on multiples of interval in wall-clock time (on the minute
+    # for interval = 60) but are tracked as time.monotonic deadlines, so
+    # collection time never accumulates as drift and clock steps don't
+    # move the schedule.
+    
+    def __init__(self, interval):
+        self.interval = interval
+        now = time.monotonic()
+        self._offset = time.time() - now
+        # The first sample is taken right away, then on boundaries
+        self.next_tick = now
+        self.tick = None
+        self.jitter_ms = None
+        self.missed = 0
+        self.sample_interval_ms = None
+    
+    def _boundary_after(self, now):
+        wall = now + self._offset
+        return now + self.interval - wall % self.interval
+    
+    def wait(self, batch_writer):
+        # interval may have changed since the last tick (adaptive mode)
+        if self.tick is not None:
+            self.next_tick = self._boundary_after(self.tick + self.interval / 2)
+        
+        sleep_with_flush(self.next_tick, batch_writer)
+        now = time.monotonic()
+        
+        # A cycle that overran whole intervals skips the ticks it missed
+        # instead of firing them back to back; this sample is the latest one
+        self.missed = int((now - self.next_tick) // self.interval)
+        tick = self.next_tick + self.missed * self.interval
+        self.jitter_ms = round((now - tick) * 1000, 3)
+        
+        # The time this sample stands for, used to weight averages
+        previous, self.tick = self.tick, tick
+        elapsed = tick - previous if previous is not None else self.interval
+        self.sample_interval_ms = round(elapsed * 1000)
+    
+    def metrics(self):
+        return {
+            'schedule_jitter_ms': self.jitter_ms,
+            'missed_ticks': self.missed,
+            'sample_interval_ms': self.sample_interval_ms
+        }
+
+
+class AdaptiveInterval:
+    # Drops to min_interval as soon as CPU or memory moves by more than its
+    # threshold between samples, then doubles back towards max_interval
+    # while the host stays quiet.
+    
+    def __init__(self, min_interval, max_interval, cpu_threshold, memory_threshold):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.cpu_threshold = cpu_threshold
+        self.memory_threshold = memory_threshold
+        self.interval = max_interval
+        self._previous = None
+    
+    def update(self, stats):
+        current = (stats['cpu_percent'], stats['memory_percent'])
+        previous, self._previous = self._previous, current
+        
+        if previous is None:
+            return self.interval
+        
+        if (abs(current[0] - previous[0]) > self.cpu_threshold
+                or abs(current[1] - previous[1]) > self.memory_threshold):
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * 2)
+        
+        return self.interval
+
+
+def handle_sigterm(signum, frame):
+    raise KeyboardInterrupt
+
+
+def run_daemon(interval, db_settings, notify_enabled, notify_config, retention_settings,
+               collection_settings, adaptive_settings=None):
+    db_manager = open_db(db_settings)
+    batch_writer = BatchWriter(
+        db_manager,
+        max_size=db_settings['batch_size'],
+        max_age=db_settings['flush_interval']
+    )
+    retention = RetentionManager(db_manager, **retention_settings)
+    collector = create_collector(**collection_settings)
+    collector.start_background_probes()
     notifier = Notifier(notify_config) if notify_enabled else None
     
     last_notification = datetime.now()
     notification_interval = timedelta(hours=24)
     
-    print(f"SysPulse daemon started (interval: {interval}s)")
-    print(f"Database: {db_path}")
+    checkpoint_interval = db_settings['checkpoint_interval']
+    last_checkpoint = time.monotonic()
+    
+    adaptive = AdaptiveInterval(**adaptive_settings) if adaptive_settings else None
+    if adaptive:
+        interval = adaptive.interval
+        print(f"SysPulse daemon started (adaptive interval: "
+              f"{adaptive.min_interval:g}-{adaptive.max_interval:g}s)")
+    else:
+        print(f"SysPulse daemon started (interval: {interval}s)")
+    print(f"Database: {db_settings['path']}")
     print(f"Press Ctrl+C to stop\n")
     
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    scheduler = TickScheduler(interval)
+    
     try:
         while True:
-            collect_once(db_manager, collector)
+            scheduler.wait(batch_writer)
+            if scheduler.missed:
+                print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] "
+                      f"Missed {scheduler.missed} ticks, previous cycle overran the interval")
+            stats = collect_once(db_manager, collector, batch_writer, scheduler)
+            if adaptive:
+                scheduler.interval = adaptive.update(stats)
             
             if notifier and (datetime.now() - last_notification) >= notification_interval:
                 try:
-                    stats = db_manager.get_stats_last_24h()
-                    notifier.send_digest(stats)
+                    batch_writer.flush()
+                    summary, total_records = db_manager.summarize(
+                        now_ms() - 24 * 3600 * 1000, metrics=SUMMARY_METRICS
+                    )
+                    notifier.send_digest(summary, total_records)
                     last_notification = datetime.now()
                     print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Daily digest sent")
                 except Exception as e:
                     print(f"Error sending notification: {e}")
             
-            time.sleep(interval)
+            try:
+                purged = retention.run_pending()
+                if purged:
+                    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Purged {purged} expired rows")
+            except Exception as e:
+                print(f"Error enforcing retention: {e}")
+            
+            if checkpoint_interval > 0 and time.monotonic() - last_checkpoint >= checkpoint_interval:
+                db_manager.checkpoint()
+                last_checkpoint = time.monotonic()
     except KeyboardInterrupt:
         print("\nSysPulse daemon stopped")
+    finally:
+        # Buffered samples are written before anything that can block
+        flushed = batch_writer.flush()
+        if flushed:
+            print(f"Flushed {flushed} buffered samples")
+        db_manager.close()
+        collector.close()
 
 
-def generate_report(db_path, format_type, hours, output_file):
-    db_manager = DBManager(db_path)
+def generate_report(db_settings, format_type, hours, output_file, precision=None):
     reporter = Reporter()
     
-    if hours:
-        stats = db_manager.get_stats_last_hours(hours)
-        print(f"Generating report for last {hours} hours...")
-    else:
-        stats = db_manager.get_all_stats()
-        print("Generating report for all data...")
-    
-    if not stats:
-        print("No data available for report")
+    with open_db(db_settings) as db_manager:
+        if hours:
+            start_ms = now_ms() - hours * 3600 * 1000
+            print(f"Generating report for last {hours} hours...")
+        else:
+            start_ms = None
+            print("Generating report for all data...")
+        
+        resolution = db_manager.pick_resolution(precision)
+        if resolution:
+            print(f"Using {resolution}s rollups")
+            stats = db_manager.get_rollups(start_ms or 0, now_ms() + 1, resolution)
+            if not stats:
+                print("No data available for report")
+                return
+            summary, _ = db_manager.summarize(
+                start_ms, metrics=SUMMARY_METRICS, resolution=resolution
+            )
+            summary['latency_targets'] = db_manager.summarize_latency(start_ms)
+            summary['hot_cores'] = db_manager.hot_cores(start_ms)
+            summary['mounts'] = db_manager.summarize_mounts(start_ms)
+            summary['processes'] = db_manager.summarize_processes(start_ms)
+            summary['highfreq'] = db_manager.summarize_highfreq(start_ms)
+            with open_output(output_file) as out:
+                out.write(reporter.generate(stats, format_type, summary) + "\n")
+            return
+        
+        # The summary is aggregated in SQL, the records are streamed, so
+        # memory stays bounded regardless of how much history is stored.
+        summary, total_records = db_manager.summarize(start_ms, metrics=SUMMARY_METRICS)
+        if not total_records:
+            print("No data available for report")
+            return
+        summary['latency_targets'] = db_manager.summarize_latency(start_ms)
+        summary['hot_cores'] = db_manager.hot_cores(start_ms)
+        summary['mounts'] = db_manager.summarize_mounts(start_ms)
+        summary['processes'] = db_manager.summarize_processes(start_ms)
+        summary['highfreq'] = db_manager.summarize_highfreq(start_ms)
+        
+        with open_output(output_file) as out:
+            reporter.stream(
+                out, db_manager.iter_stats(start_ms), RAW_COLUMNS,
+                format_type, summary, total_records
+            )
+
+
+@contextmanager
+def open_output(output_file):
+    if not output_file:
+        yield sys.stdout
         return
     
-    report = reporter.generate(stats, format_type)
+    with open(output_file, 'w') as f:
+        yield f
+    print(f"Report saved to {output_file}")
+
+
+def run_migration(db_settings, batch_size):
+    with open_db(db_settings, check_migration=False) as db_manager:
+        if not db_manager.needs_migration():
+            print("Database already uses integer epoch timestamps")
+            return
+        
+        print(f"Migrating {db_settings['path']} to epoch-millisecond timestamps...")
+        migrated = db_manager.migrate_timestamps(
+            batch_size=batch_size,
+            progress=lambda count: print(f"  {count} rows converted")
+        )
+        print(f"Migration complete: {migrated} rows converted")
+
+
+def run_index_advisor(db_settings):
+    with open_db(db_settings) as db_manager:
+        advice = db_manager.advise_indexes()
+    
+    print("QUERY PLANS")
+    print("-" * 70)
+    for name, details in advice['plans'].items():
+        print(f"{name}:")
+        for detail in details:
+            print(f"  {detail}")
     
-    if output_file:
-        with open(output_file, 'w') as f:
-            f.write(report)
-        print(f"Report saved to {output_file}")
+    print("")
+    print(f"Used indexes:   {', '.join(advice['used']) or 'none'}")
+    print(f"Unused indexes: {', '.join(advice['unused']) or 'none'}")
+    
+    if advice['missing']:
+        print("Queries without a supporting index:")
+        for name, detail in advice['missing']:
+            print(f"  {name}: {detail}")
     else:
-        print(report)
+        print("Queries without a supporting index: none")
 
 
 def main():
@@ -118,11 +477,36 @@ def main():
     report_parser.add_argument(
         '--output', help='Output file (default: stdout)'
     )
+    report_parser.add_argument(
+        '--precision', type=int,
+        help='Coarsest acceptable time resolution in seconds; '
+             'uses the matching rollup table (default: raw samples)'
+    )
     report_parser.add_argument(
         '--config', default='config.ini',
         help='Configuration file path (default: config.ini)'
     )
     
+    migrate_parser = subparsers.add_parser(
+        'migrate', help='Convert legacy text timestamps to epoch milliseconds'
+    )
+    migrate_parser.add_argument(
+        '--batch-size', type=int, default=5000,
+        help='Rows converted per transaction (default: 5000)'
+    )
+    migrate_parser.add_argument(
+        '--config', default='config.ini',
+        help='Configuration file path (default: config.ini)'
+    )
+    
+    advisor_parser = subparsers.add_parser(
+        'index-advisor', help='Report unused and missing indexes for the query catalogue'
+    )
+    advisor_parser.add_argument(
+        '--config', default='config.ini',
+        help='Configuration file path (default: config.ini)'
+    )
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -131,28 +515,41 @@ def main():
     
     config = load_config(args.config)
     
+    db_settings = get_db_settings(config)
+    collection_settings = get_collection_settings(config)
+    
     if args.command == 'start':
         interval = args.interval
-        db_path = config.get('database', 'path', fallback='data/syspulse.db') if config else 'data/syspulse.db'
         notify_enabled = config.getboolean('notifications', 'enabled', fallback=False) if config else False
         notify_config = dict(config['notifications']) if config and notify_enabled else {}
         
-        run_daemon(interval, db_path, notify_enabled, notify_config)
+        retention_settings = get_retention_settings(config)
+        adaptive_settings = get_adaptive_settings(config)
+        
+        run_daemon(interval, db_settings, notify_enabled, notify_config, retention_settings,
+                   collection_settings, adaptive_settings)
     
     elif args.command == 'collect':
-        db_path = config.get('database', 'path', fallback='data/syspulse.db') if config else 'data/syspulse.db'
-        db_manager = DBManager(db_path)
-        collector = StatsCollector()
+        collector = create_collector(**collection_settings)
         
-        stats = collect_once(db_manager, collector)
-        print(f"CPU: {stats['cpu_percent']}%")
-        print(f"Memory: {stats['memory_percent']}%")
-        print(f"Disk: {stats['disk_percent']}%")
-        print(f"Network Latency: {stats['network_latency_ms']}ms")
+        try:
+            with open_db(db_settings) as db_manager:
+                stats = collect_once(db_manager, collector)
+        finally:
+            collector.close()
+        print(f"CPU: {stats.get('cpu_percent')}%")
+        print(f"Memory: {stats.get('memory_percent')}%")
+        print(f"Disk: {stats.get('disk_percent')}%")
+        print(f"Network Latency: {stats.get('network_latency_ms')}ms")
     
     elif args.command == 'report':
-        db_path = config.get('database', 'path', fallback='data/syspulse.db') if config else 'data/syspulse.db'
-        generate_report(db_path, args.format, args.hours, args.output)
+        generate_report(db_settings, args.format, args.hours, args.output, args.precision)
+    
+    elif args.command == 'migrate':
+        run_migration(db_settings, args.batch_size)
+    
+    elif args.command == 'index-advisor':
+        run_index_advisor(db_settings)
 
 
 if __name__ == '__main__':
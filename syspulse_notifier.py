@@ -17,15 +17,15 @@ class Notifier:
         self.config = config
         self.notification_type = config.get('type', 'email')
     
-    def send_digest(self, stats):
+    def send_digest(self, summary, total_records):
         if self.notification_type == 'email':
-            return self._send_email(stats)
+            return self._send_email(summary, total_records)
         elif self.notification_type == 'webhook':
-            return self._send_webhook(stats)
+            return self._send_webhook(summary, total_records)
         else:
             raise ValueError(f"Unknown notification type: {self.notification_type}")
     
-    def _send_email(self, stats):
+    def _send_email(self, summary, total_records):
         smtp_host = self.config.get('smtp_host', 'localhost')
         smtp_port = int(self.config.get('smtp_port', 587))
         smtp_user = self.config.get('smtp_user', '')
@@ -36,7 +36,7 @@ class Notifier:
         if not to_addr:
             raise ValueError("No recipient email address configured")
         
-        summary = self._generate_summary(stats)
+        summary = self._generate_summary(summary, total_records)
         
         msg = MIMEMultipart('alternative')
         msg['Subject'] = f"SysPulse Daily Digest - {datetime.now().strftime('%Y-%m-%d')}"
@@ -57,7 +57,7 @@ class Notifier:
         except Exception as e:
             raise Exception(f"Failed to send email: {e}")
     
-    def _send_webhook(self, stats):
+    def _send_webhook(self, summary, total_records):
         if not REQUESTS_AVAILABLE:
             raise ImportError("requests library required for webhook notifications")
         
@@ -65,12 +65,12 @@ class Notifier:
         if not webhook_url:
             raise ValueError("No webhook URL configured")
         
-        summary = self._generate_summary(stats)
+        summary = self._generate_summary(summary, total_records)
         
         payload = {
             'timestamp': datetime.now().isoformat(),
             'period': 'last_24h',
-            'total_records': len(stats),
+            'total_records': total_records,
             'summary': summary
         }
         
@@ -86,41 +86,22 @@ class Notifier:
         except Exception as e:
             raise Exception(f"Failed to send webhook: {e}")
     
-    def _generate_summary(self, stats):
-        if not stats:
+    def _generate_summary(self, summary, total_records):
+        if not total_records:
             return {
                 'cpu': {'avg': 0, 'min': 0, 'max': 0},
                 'memory': {'avg': 0, 'min': 0, 'max': 0},
                 'disk': {'avg': 0, 'min': 0, 'max': 0},
-                'network': {'avg': None, 'min': None, 'max': None}
+                'network': {'avg': None, 'min': None, 'max': None},
+                'cpu_core': {'avg': None, 'min': None, 'max': None}
             }
         
-        cpu_values = [s['cpu_percent'] for s in stats]
-        memory_values = [s['memory_percent'] for s in stats]
-        disk_values = [s['disk_percent'] for s in stats]
-        network_values = [s['network_latency_ms'] for s in stats if s.get('network_latency_ms') is not None]
-        
         return {
-            'cpu': {
-                'avg': round(sum(cpu_values) / len(cpu_values), 2),
-                'min': round(min(cpu_values), 2),
-                'max': round(max(cpu_values), 2)
-            },
-            'memory': {
-                'avg': round(sum(memory_values) / len(memory_values), 2),
-                'min': round(min(memory_values), 2),
-                'max': round(max(memory_values), 2)
-            },
-            'disk': {
-                'avg': round(sum(disk_values) / len(disk_values), 2),
-                'min': round(min(disk_values), 2),
-                'max': round(max(disk_values), 2)
-            },
-            'network': {
-                'avg': round(sum(network_values) / len(network_values), 2) if network_values else None,
-                'min': round(min(network_values), 2) if network_values else None,
-                'max': round(max(network_values), 2) if network_values else None
+            key: {
+                name: round(value, 2) if value is not None else None
+                for name, value in values.items()
             }
+            for key, values in summary.items()
         }
     
     def _format_email_text(self, summary):
@@ -137,6 +118,13 @@ class Notifier:
         lines.append(f"  Minimum: {summary['cpu']['min']}%")
         lines.append(f"  Maximum: {summary['cpu']['max']}%")
         lines.append("")
+        
+        if summary.get('cpu_core', {}).get('avg') is not None:
+            lines.append(f"Busiest CPU Core:")
+            lines.append(f"  Average: {summary['cpu_core']['avg']}%")
+            lines.append(f"  Maximum: {summary['cpu_core']['max']}%")
+            lines.append("")
+        
         lines.append(f"Memory Usage:")
         lines.append(f"  Average: {summary['memory']['avg']}%")
         lines.append(f"  Minimum: {summary['memory']['min']}%")
@@ -155,6 +143,22 @@ class Notifier:
             lines.append(f"  Maximum: {summary['network']['max']}ms")
             lines.append("")
         
+        if summary.get('disk_read', {}).get('avg') is not None:
+            lines.append(f"Disk Throughput:")
+            lines.append(f"  Read:    Avg {summary['disk_read']['avg'] / 1e6:.2f}MB/s, "
+                         f"Max {summary['disk_read']['max'] / 1e6:.2f}MB/s")
+            lines.append(f"  Write:   Avg {summary['disk_write']['avg'] / 1e6:.2f}MB/s, "
+                         f"Max {summary['disk_write']['max'] / 1e6:.2f}MB/s")
+            lines.append("")
+        
+        if summary.get('net_recv', {}).get('avg') is not None:
+            lines.append(f"Network Throughput:")
+            lines.append(f"  In:      Avg {summary['net_recv']['avg'] / 1e6:.2f}MB/s, "
+                         f"Max {summary['net_recv']['max'] / 1e6:.2f}MB/s")
+            lines.append(f"  Out:     Avg {summary['net_sent']['avg'] / 1e6:.2f}MB/s, "
+                         f"Max {summary['net_sent']['max'] / 1e6:.2f}MB/s")
+            lines.append("")
+        
         lines.append("=" * 50)
         lines.append("Generated by SysPulse")
         
@@ -162,23 +166,20 @@ class Notifier:
 
 
 if __name__ == '__main__':
-    test_stats = [
-        {
-            'cpu_percent': 45.5,
-            'memory_percent': 62.3,
-            'disk_percent': 75.2,
-            'network_latency_ms': 15.5
-        },
-        {
-            'cpu_percent': 50.2,
-            'memory_percent': 63.1,
-            'disk_percent': 75.3,
-            'network_latency_ms': 16.2
-        }
-    ]
+    test_summary = {
+        'cpu': {'avg': 47.85, 'min': 45.5, 'max': 50.2},
+        'memory': {'avg': 62.7, 'min': 62.3, 'max': 63.1},
+        'disk': {'avg': 75.25, 'min': 75.2, 'max': 75.3},
+        'network': {'avg': 15.85, 'min': 15.5, 'max': 16.2},
+        'cpu_core': {'avg': 81.4, 'min': 62.0, 'max': 100.0},
+        'disk_read': {'avg': 5242880.0, 'min': 0.0, 'max': 73400320.0},
+        'disk_write': {'avg': 1048576.0, 'min': 0.0, 'max': 20971520.0},
+        'net_recv': {'avg': 262144.0, 'min': 1024.0, 'max': 10485760.0},
+        'net_sent': {'avg': 131072.0, 'min': 512.0, 'max': 5242880.0}
+    }
     
     notifier = Notifier({'type': 'webhook', 'webhook_url': 'http://example.com/hook'})
-    summary = notifier._generate_summary(test_stats)
+    summary = notifier._generate_summary(test_summary, 2)
     print("Summary:")
     print(json.dumps(summary, indent=2))
     
@@ -1,20 +1,60 @@
 import json
 import csv
 from io import StringIO
+from itertools import islice
 from datetime import datetime
 
+from db_manager import DEFAULT_SAMPLE_INTERVAL_MS
+
+
+SUMMARY_METRICS = {
+    'cpu': 'cpu_percent',
+    'memory': 'memory_percent',
+    'disk': 'disk_percent',
+    'network': 'network_latency_ms',
+    'cpu_core': 'cpu_core_max',
+    'disk_read_iops': 'disk_read_iops',
+    'disk_write_iops': 'disk_write_iops',
+    'disk_read': 'disk_read_bps',
+    'disk_write': 'disk_write_bps',
+    'net_recv': 'net_recv_bps',
+    'net_sent': 'net_sent_bps',
+    'cgroup_memory': 'cgroup_memory_percent',
+    'cgroup_throttled': 'cgroup_cpu_throttled_percent',
+    'psi_cpu': 'psi_cpu_some',
+    'psi_memory': 'psi_memory_some',
+    'psi_io': 'psi_io_some',
+    'jitter': 'schedule_jitter_ms'
+}
+
+# (label, summary key, divisor, unit) for optional summary lines
+OPTIONAL_SUMMARIES = (
+    ('Disk Reads:', 'disk_read_iops', 1, ' IOPS'),
+    ('Disk Writes:', 'disk_write_iops', 1, ' IOPS'),
+    ('Disk Read:', 'disk_read', 1e6, ' MB/s'),
+    ('Disk Write:', 'disk_write', 1e6, ' MB/s'),
+    ('Network In:', 'net_recv', 1e6, ' MB/s'),
+    ('Network Out:', 'net_sent', 1e6, ' MB/s'),
+    ('cgroup Memory:', 'cgroup_memory', 1, '%'),
+    ('CPU Throttled:', 'cgroup_throttled', 1, '% of periods'),
+    ('CPU Pressure:', 'psi_cpu', 1, '%'),
+    ('Memory Pressure:', 'psi_memory', 1, '%'),
+    ('IO Pressure:', 'psi_io', 1, '%'),
+    ('Schedule Jitter:', 'jitter', 1, ' ms')
+)
+
 
 class Reporter:
     
-    def generate(self, stats, format_type='text'):
+    def generate(self, stats, format_type='text', summary=None):
         if format_type == 'json':
-            return self.generate_json(stats)
+            return self.generate_json(stats, summary)
         elif format_type == 'csv':
             return self.generate_csv(stats)
         else:
-            return self.generate_text(stats)
+            return self.generate_text(stats, summary)
     
-    def generate_json(self, stats):
+    def generate_json(self, stats, summary=None):
         report = {
             'generated_at': datetime.now().isoformat(),
             'total_records': len(stats),
@@ -22,7 +62,7 @@ class Reporter:
         }
         
         if stats:
-            report['summary'] = self._calculate_summary(stats)
+            report['summary'] = summary or self._calculate_summary(stats)
         
         return json.dumps(report, indent=2)
     
@@ -41,25 +81,63 @@ class Reporter:
         
         return output.getvalue()
     
-    def generate_text(self, stats):
+    def generate_text(self, stats, summary=None):
         if not stats:
             return "No data available"
         
+        summary = summary or self._calculate_summary(stats)
+        return "\n".join(self._text_lines(stats[:10], summary, len(stats)))
+    
+    def stream(self, out, rows, columns, format_type, summary, total_records):
+        if format_type == 'json':
+            self.stream_json(out, rows, columns, summary, total_records)
+        elif format_type == 'csv':
+            self.stream_csv(out, rows, columns)
+        else:
+            records = [dict(zip(columns, row)) for row in islice(rows, 10)]
+            out.write("\n".join(self._text_lines(records, summary, total_records)))
+            out.write("\n")
+    
+    def stream_json(self, out, rows, columns, summary, total_records):
+        out.write("{\n")
+        out.write(f'  "generated_at": {json.dumps(datetime.now().isoformat())},\n')
+        out.write(f'  "total_records": {total_records},\n')
+        out.write('  "statistics": [')
+        
+        separator = "\n    "
+        for row in rows:
+            out.write(separator)
+            out.write(json.dumps(dict(zip(columns, row))))
+            separator = ",\n    "
+        
+        out.write("\n  ],\n")
+        out.write(f'  "summary": {json.dumps(summary)}\n')
+        out.write("}\n")
+    
+    def stream_csv(self, out, rows, columns):
+        writer = csv.writer(out)
+        writer.writerow(columns)
+        writer.writerows(rows)
+    
+    def _text_lines(self, records, summary, total_records):
         lines = []
         lines.append("=" * 70)
         lines.append("SYSPULSE SYSTEM STATISTICS REPORT")
         lines.append("=" * 70)
         lines.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        lines.append(f"Total Records: {len(stats)}")
+        lines.append(f"Total Records: {total_records}")
         lines.append("")
         
-        if stats:
-            summary = self._calculate_summary(stats)
+        if summary:
             lines.append("SUMMARY (All Records)")
             lines.append("-" * 70)
             lines.append(f"CPU Usage:        Avg: {summary['cpu']['avg']:.2f}%  "
                         f"Min: {summary['cpu']['min']:.2f}%  "
                         f"Max: {summary['cpu']['max']:.2f}%")
+            if summary.get('cpu_core', {}).get('avg') is not None:
+                lines.append(f"Busiest Core:     Avg: {summary['cpu_core']['avg']:.2f}%  "
+                            f"Min: {summary['cpu_core']['min']:.2f}%  "
+                            f"Max: {summary['cpu_core']['max']:.2f}%")
             lines.append(f"Memory Usage:     Avg: {summary['memory']['avg']:.2f}%  "
                         f"Min: {summary['memory']['min']:.2f}%  "
                         f"Max: {summary['memory']['max']:.2f}%")
@@ -71,60 +149,160 @@ class Reporter:
                 lines.append(f"Network Latency:  Avg: {summary['network']['avg']:.2f}ms  "
                             f"Min: {summary['network']['min']:.2f}ms  "
                             f"Max: {summary['network']['max']:.2f}ms")
+            
+            for label, key, divisor, unit in OPTIONAL_SUMMARIES:
+                result = summary.get(key)
+                if not result or result['avg'] is None:
+                    continue
+                lines.append(f"{label:<18}Avg: {result['avg'] / divisor:.2f}{unit}  "
+                             f"Min: {result['min'] / divisor:.2f}{unit}  "
+                             f"Max: {result['max'] / divisor:.2f}{unit}")
+            
+            if summary.get('hot_cores'):
+                lines.append("Hot Cores:        " + ", ".join(
+                    f"core {core} ({count} samples)"
+                    for core, count in islice(summary['hot_cores'].items(), 8)
+                ))
+            
+            if summary.get('processes'):
+                lines.append("Top Processes:")
+                for name, result in summary['processes'].items():
+                    lines.append(f"  {name:<24} CPU Avg: {result['avg_cpu']:.2f}%  "
+                                 f"Max: {result['max_cpu']:.2f}%  "
+                                 f"RSS Max: {result['max_rss_mb']:.1f}MB  "
+                                 f"({result['intervals']} intervals)")
+            
+            if summary.get('highfreq'):
+                lines.append("High-Frequency Samples:")
+                for metric, result in summary['highfreq'].items():
+                    lines.append(f"  {metric:<24} Avg: {result['avg']:.2f}  "
+                                 f"Max: {result['max']:.2f}  "
+                                 f"Worst p99: {result['max_p99']:.2f}  "
+                                 f"({result['samples']} samples)")
+            
+            if summary.get('mounts'):
+                lines.append("Mounts:")
+                for mountpoint, result in summary['mounts'].items():
+                    usage = (f"Avg: {result['avg']:.2f}%  Max: {result['max']:.2f}%"
+                             if result['avg'] is not None else "N/A")
+                    line = f"  {mountpoint:<24} {usage}"
+                    if result['unresponsive']:
+                        line += f"  ({result['unresponsive']} unresponsive)"
+                    lines.append(line)
+            
+            if summary.get('latency_targets'):
+                lines.append("Latency Targets:")
+                for target, result in summary['latency_targets'].items():
+                    lines.append(f"  {target:<24} p50: {self._format_ms(result['p50_ms'])}  "
+                                 f"p95: {self._format_ms(result['p95_ms'])}  "
+                                 f"Loss: {result['loss_rate']:.1%}")
             lines.append("")
         
         lines.append("RECENT RECORDS (Last 10)")
         lines.append("-" * 70)
         
-        for stat in stats[:10]:
-            lines.append(f"\nTimestamp: {stat['timestamp']}")
-            lines.append(f"  CPU:     {stat['cpu_percent']}%")
+        for stat in records:
+            if 'resolution' in stat:
+                lines.extend(self._format_rollup_record(stat))
+                continue
+            
+            lines.append(f"\nTimestamp: {self._format_timestamp(stat['timestamp'])}")
+            if stat.get('cpu_core_max') is not None:
+                lines.append(f"  CPU:     {stat['cpu_percent']}% (busiest core {stat['cpu_core_max']}%)")
+            else:
+                lines.append(f"  CPU:     {stat['cpu_percent']}%")
             lines.append(f"  Memory:  {stat['memory_percent']}% "
                         f"({stat['memory_used_gb']:.2f}GB / {stat['memory_total_gb']:.2f}GB)")
             lines.append(f"  Disk:    {stat['disk_percent']}% "
                         f"({stat['disk_used_gb']:.2f}GB / {stat['disk_total_gb']:.2f}GB)")
             lines.append(f"  Uptime:  {self._format_uptime(stat['uptime_seconds'])}")
             
+            if stat.get('disk_read_bps') is not None:
+                lines.append(f"  Disk IO: {stat['disk_read_iops']:.0f} r/s  {stat['disk_write_iops']:.0f} w/s  "
+                            f"{stat['disk_read_bps'] / 1e6:.2f} MB/s read  "
+                            f"{stat['disk_write_bps'] / 1e6:.2f} MB/s written")
+            if stat.get('net_recv_bps') is not None:
+                lines.append(f"  Net IO:  {stat['net_recv_bps'] / 1e6:.2f} MB/s in  "
+                            f"{stat['net_sent_bps'] / 1e6:.2f} MB/s out")
+            
             if stat['network_latency_ms'] is not None:
                 lines.append(f"  Network: {stat['network_latency_ms']}ms")
             else:
                 lines.append(f"  Network: N/A")
+            
+            if stat.get('stale_sources'):
+                lines.append(f"  Stale:   {stat['stale_sources']}")
         
         lines.append("")
         lines.append("=" * 70)
         
-        return "\n".join(lines)
+        return lines
     
     def _calculate_summary(self, stats):
-        cpu_values = [s['cpu_percent'] for s in stats]
-        memory_values = [s['memory_percent'] for s in stats]
-        disk_values = [s['disk_percent'] for s in stats]
-        network_values = [s['network_latency_ms'] for s in stats if s['network_latency_ms'] is not None]
-        
-        summary = {
-            'cpu': {
-                'avg': sum(cpu_values) / len(cpu_values),
-                'min': min(cpu_values),
-                'max': max(cpu_values)
-            },
-            'memory': {
-                'avg': sum(memory_values) / len(memory_values),
-                'min': min(memory_values),
-                'max': max(memory_values)
-            },
-            'disk': {
-                'avg': sum(disk_values) / len(disk_values),
-                'min': min(disk_values),
-                'max': max(disk_values)
-            },
-            'network': {
-                'avg': sum(network_values) / len(network_values) if network_values else None,
-                'min': min(network_values) if network_values else None,
-                'max': max(network_values) if network_values else None
-            }
+        return {
+            key: self._summarize_metric(stats, metric)
+            for key, metric in SUMMARY_METRICS.items()
         }
+    
+    def _summarize_metric(self, stats, metric):
+        total = 0.0
+        weights = 0
+        low = None
+        high = None
         
-        return summary
+        for stat in stats:
+            value = stat.get(metric)
+            if value is None:
+                continue
+            
+            # Averages are time-weighted; rollup records carry their own
+            # weight and extremes
+            weight = stat.get(f"{metric}_weight")
+            if weight is None:
+                weight = stat.get('sample_interval_ms') or DEFAULT_SAMPLE_INTERVAL_MS
+            value_min = stat.get(f"{metric}_min", value)
+            value_max = stat.get(f"{metric}_max", value)
+            
+            total += value * weight
+            weights += weight
+            low = value_min if low is None else min(low, value_min)
+            high = value_max if high is None else max(high, value_max)
+        
+        return {
+            'avg': total / weights if weights else None,
+            'min': low,
+            'max': high
+        }
+    
+    def _format_rollup_record(self, stat):
+        lines = [f"\nBucket: {self._format_timestamp(stat['timestamp'])} "
+                 f"({stat['resolution']}s, {stat['samples']} samples)"]
+        
+        for label, metric, unit, divisor in (('CPU', 'cpu_percent', '%', 1),
+                                             ('Core', 'cpu_core_max', '%', 1),
+                                             ('Memory', 'memory_percent', '%', 1),
+                                             ('Disk', 'disk_percent', '%', 1),
+                                             ('Network', 'network_latency_ms', 'ms', 1),
+                                             ('Reads', 'disk_read_iops', ' IOPS', 1),
+                                             ('Writes', 'disk_write_iops', ' IOPS', 1),
+                                             ('Read', 'disk_read_bps', ' MB/s', 1e6),
+                                             ('Written', 'disk_write_bps', ' MB/s', 1e6),
+                                             ('Net In', 'net_recv_bps', ' MB/s', 1e6),
+                                             ('Net Out', 'net_sent_bps', ' MB/s', 1e6)):
+            if stat[metric] is None:
+                lines.append(f"  {label + ':':<9}N/A")
+                continue
+            lines.append(f"  {label + ':':<9}Avg: {stat[metric] / divisor:.2f}{unit}  "
+                         f"Min: {stat[f'{metric}_min'] / divisor:.2f}{unit}  "
+                         f"Max: {stat[f'{metric}_max'] / divisor:.2f}{unit}")
+        
+        return lines
+    
+    def _format_ms(self, value):
+        return f"{value:.2f}ms" if value is not None else "N/A"
+    
+    def _format_timestamp(self, epoch_ms):
+        return datetime.fromtimestamp(epoch_ms / 1000).strftime('%Y-%m-%d %H:%M:%S')
     
     def _format_uptime(self, seconds):
         days = seconds // 86400
@@ -146,7 +324,7 @@ if __name__ == '__main__':
     test_stats = [
         {
             'id': 1,
-            'timestamp': '2025-10-31T10:00:00',
+            'timestamp': 1761904800000,
             'cpu_percent': 45.5,
             'memory_percent': 62.3,
             'memory_used_gb': 10.5,
@@ -159,7 +337,7 @@ if __name__ == '__main__':
         },
         {
             'id': 2,
-            'timestamp': '2025-10-31T10:01:00',
+            'timestamp': 1761904860000,
             'cpu_percent': 50.2,
             'memory_percent': 63.1,
             'memory_used_gb': 10.6,
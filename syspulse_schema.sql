@@ -1,6 +1,6 @@
 CREATE TABLE IF NOT EXISTS system_stats (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
-    timestamp TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
     cpu_percent REAL NOT NULL,
     memory_percent REAL NOT NULL,
     memory_used_gb REAL NOT NULL,
@@ -9,10 +9,103 @@ CREATE TABLE IF NOT EXISTS system_stats (
     disk_used_gb REAL NOT NULL,
     disk_total_gb REAL NOT NULL,
     uptime_seconds INTEGER NOT NULL,
-    network_latency_ms REAL
+    network_latency_ms REAL,
+    cpu_core_max REAL,
+    cpu_per_core BLOB,
+    disk_read_iops REAL,
+    disk_write_iops REAL,
+    disk_read_bps REAL,
+    disk_write_bps REAL,
+    net_recv_bps REAL,
+    net_sent_bps REAL,
+    cgroup_memory_used_gb REAL,
+    cgroup_memory_limit_gb REAL,
+    cgroup_memory_percent REAL,
+    cgroup_cpu_throttled_percent REAL,
+    cgroup_cpu_throttled_ms_per_s REAL,
+    psi_cpu_some REAL,
+    psi_memory_some REAL,
+    psi_memory_full REAL,
+    psi_io_some REAL,
+    psi_io_full REAL,
+    stale_sources TEXT,
+    schedule_jitter_ms REAL,
+    missed_ticks INTEGER,
+    sample_interval_ms INTEGER
 );
 
 CREATE INDEX IF NOT EXISTS idx_timestamp ON system_stats(timestamp);
-CREATE INDEX IF NOT EXISTS idx_cpu_percent ON system_stats(cpu_percent);
-CREATE INDEX IF NOT EXISTS idx_memory_percent ON system_stats(memory_percent);
-CREATE INDEX IF NOT EXISTS idx_disk_percent ON system_stats(disk_percent);
+
+CREATE TABLE IF NOT EXISTS stats_rollup (
+    resolution INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    metric TEXT NOT NULL,
+    sample_count INTEGER NOT NULL,
+    value_sum REAL NOT NULL,
+    value_sum_sq REAL NOT NULL,
+    value_min REAL NOT NULL,
+    value_max REAL NOT NULL,
+    weight_sum REAL NOT NULL DEFAULT 0,
+    weighted_sum REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (resolution, bucket, metric)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS stats_partitions (
+    name TEXT PRIMARY KEY,
+    start_ms INTEGER NOT NULL,
+    end_ms INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_partitions_start ON stats_partitions(start_ms);
+
+CREATE TABLE IF NOT EXISTS latency_stats (
+    id INTEGER PRIMARY KEY,
+    timestamp INTEGER NOT NULL,
+    target TEXT NOT NULL,
+    p50_ms REAL,
+    p95_ms REAL,
+    loss_rate REAL NOT NULL,
+    probes INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_latency_stats_timestamp ON latency_stats(timestamp);
+
+CREATE TABLE IF NOT EXISTS mount_stats (
+    id INTEGER PRIMARY KEY,
+    timestamp INTEGER NOT NULL,
+    mountpoint TEXT NOT NULL,
+    device TEXT,
+    fstype TEXT,
+    total_gb REAL,
+    used_gb REAL,
+    percent REAL,
+    responsive INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_mount_stats_timestamp ON mount_stats(timestamp);
+
+CREATE TABLE IF NOT EXISTS top_processes (
+    id INTEGER PRIMARY KEY,
+    timestamp INTEGER NOT NULL,
+    pid INTEGER NOT NULL,
+    name TEXT,
+    cpu_percent REAL NOT NULL,
+    rss_mb REAL NOT NULL,
+    rss_delta_mb REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_top_processes_timestamp ON top_processes(timestamp);
+
+CREATE TABLE IF NOT EXISTS highfreq_stats (
+    id INTEGER PRIMARY KEY,
+    timestamp INTEGER NOT NULL,
+    metric TEXT NOT NULL,
+    samples INTEGER NOT NULL,
+    value_mean REAL NOT NULL,
+    value_min REAL NOT NULL,
+    value_max REAL NOT NULL,
+    value_p99 REAL NOT NULL,
+    value_last REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_highfreq_stats_timestamp ON highfreq_stats(timestamp);
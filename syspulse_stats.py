@@ -1,79 +1,1034 @@
+import asyncio
+import os
 import psutil
-import socket
+import sys
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 
 
+GB = 1024 ** 3
+
+COLLECTOR_BACKENDS = ('auto', 'psutil', 'procfs')
+
+DEFAULT_MOUNT_FSTYPES_EXCLUDE = ('tmpfs', 'devtmpfs', 'squashfs', 'overlay')
+
+PRESSURE_RESOURCES = ('cpu', 'memory', 'io')
+
+# Seconds between runs per metric source; unlisted sources run every tick.
+# latency, mounts and processes default to their own interval settings.
+DEFAULT_SOURCE_INTERVALS = {
+    'disk': 300
+}
+
+SCHEDULE_SLACK = 0.5
+
+# Metrics sampled into the high-frequency ring buffer
+HIGHFREQ_METRICS = ('cpu_percent', 'cpu_core_max', 'memory_percent')
+
+PSUTIL_USED_IS_AVAILABLE = psutil.version_info >= (7, 1)
+
+MEMINFO_KEYS = (
+    b'MemTotal:', b'\nMemFree:', b'\nMemAvailable:',
+    b'\nBuffers:', b'\nCached:', b'\nSReclaimable:'
+)
+
+
+# Stored rate metric -> cumulative counter it is derived from
+DISK_RATE_FIELDS = {
+    'disk_read_iops': 'read_count',
+    'disk_write_iops': 'write_count',
+    'disk_read_bps': 'read_bytes',
+    'disk_write_bps': 'write_bytes'
+}
+
+NET_RATE_FIELDS = {
+    'net_recv_bps': 'bytes_recv',
+    'net_sent_bps': 'bytes_sent'
+}
+
+
+def counter_delta(before, after):
+    if after >= before:
+        return after - before
+    # Only a counter that was near the top of the 32-bit range wrapped
+    # around; anything else was reset (a re-added device, a 64-bit counter
+    # restarting from 0) and would otherwise add up to 4 GiB.
+    if 2 ** 31 <= before < 2 ** 32:
+        return after + 2 ** 32 - before
+    return 0
+
+
+def is_partition(name, devices):
+    # sda1 -> sda, nvme0n1p2 -> nvme0n1, mmcblk0p1 -> mmcblk0
+    base = name.rstrip('0123456789')
+    if base == name:
+        return False
+    return base in devices or (base.endswith('p') and base[:-1] in devices)
+
+
+def read_disk_counters():
+    # Partitions repeat their parent disk's I/O and loop/ram devices are
+    # not backed by a disk, so both are left out of the totals.
+    counters = psutil.disk_io_counters(perdisk=True, nowrap=False) or {}
+    return {
+        name: values for name, values in counters.items()
+        if not name.startswith(('loop', 'ram')) and not is_partition(name, counters)
+    }
+
+
+def read_net_counters():
+    counters = psutil.net_io_counters(pernic=True, nowrap=False) or {}
+    return {name: values for name, values in counters.items() if name != 'lo'}
+
+
+def split_cpu_times(times):
+    # guest time is already accounted for in user/nice on Linux
+    total = sum(times) - getattr(times, 'guest', 0) - getattr(times, 'guest_nice', 0)
+    return total, times.idle + getattr(times, 'iowait', 0)
+
+
+def read_psutil_cpu_times():
+    # Aggregate first, then one (total, idle) pair per core
+    return [split_cpu_times(psutil.cpu_times())] + [
+        split_cpu_times(times) for times in psutil.cpu_times(percpu=True)
+    ]
+
+
+class CpuSampler:
+    
+    def __init__(self, min_interval=0.1, read_times=read_psutil_cpu_times):
+        self.min_interval = min_interval
+        self.read_times = read_times
+        self._previous = read_times()
+        self._created_at = time.monotonic()
+        self._primed = False
+    
+    def sample(self):
+        return self.sample_all()[0]
+    
+    def sample_all(self):
+        # Only the first call right after construction can come too soon
+        # to produce a meaningful delta; later calls never sleep.
+        if not self._primed:
+            wait = self.min_interval - (time.monotonic() - self._created_at)
+            if wait > 0:
+                time.sleep(wait)
+            self._primed = True
+        
+        current = self.read_times()
+        previous = self._previous
+        self._previous = current
+        
+        # A core that appeared or went offline since the previous sample
+        # is left out until it has two snapshots.
+        cores = [
+            self._busy_percent(before, after)
+            for before, after in zip(previous[1:], current[1:])
+        ]
+        return self._busy_percent(previous[0], current[0]), cores
+    
+    def _busy_percent(self, previous, current):
+        total = current[0] - previous[0]
+        if total <= 0:
+            return 0.0
+        
+        busy = total - (current[1] - previous[1])
+        return max(0.0, min(100.0, busy / total * 100))
+
+
+def percentile(values, pct):
+    # Nearest-rank percentile of an already sorted list
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * pct // 100))
+    return values[int(rank) - 1]
+
+
+class LatencyProber:
+    
+    def __init__(self, targets, interval=15, timeout=5, probes=3):
+        self.targets = list(targets)
+        self.interval = interval
+        self.timeout = timeout
+        self.probes = max(1, probes)
+        self._result = (None, None)
+        self._stop = None
+        self._thread = None
+    
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+    
+    def probe(self):
+        results = asyncio.run(self._probe_all())
+        
+        # Swapped as one tuple so readers never see results with the
+        # wrong measurement time.
+        self._result = (results, time.monotonic())
+        return results
+    
+    async def _probe_all(self):
+        return await asyncio.gather(*(
+            self._probe_target(host, port) for host, port in self.targets
+        ))
+    
+    async def _probe_target(self, host, port):
+        samples = []
+        for _ in range(self.probes):
+            latency = await self._connect_once(host, port)
+            if latency is not None:
+                samples.append(latency)
+        
+        samples.sort()
+        p50 = percentile(samples, 50)
+        p95 = percentile(samples, 95)
+        
+        return {
+            'target': f"{host}:{port}",
+            'p50_ms': round(p50, 2) if p50 is not None else None,
+            'p95_ms': round(p95, 2) if p95 is not None else None,
+            'loss_rate': round(1 - len(samples) / self.probes, 4),
+            'probes': self.probes
+        }
+    
+    async def open_connection(self, host, port):
+        return await asyncio.open_connection(host, port)
+    
+    async def _connect_once(self, host, port):
+        start = time.perf_counter_ns()
+        try:
+            _, writer = await asyncio.wait_for(
+                self.open_connection(host, port), self.timeout
+            )
+        except (asyncio.TimeoutError, OSError):
+            return None
+        
+        latency_ms = (time.perf_counter_ns() - start) / 1e6
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        
+        return latency_ms
+    
+    def latest(self):
+        results, measured_at = self._result
+        if measured_at is None:
+            return [], None
+        return results, round(time.monotonic() - measured_at, 2)
+    
+    def start(self):
+        if self.running:
+            return
+        # Each thread gets its own event, so one abandoned by stop() exits
+        # after its probe even if the prober is started again
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(self._stop,), name='syspulse-latency', daemon=True
+        )
+        self._thread.start()
+    
+    def stop(self):
+        # Not joined: a probe in flight can take timeout * probes seconds
+        # and can't be interrupted, which would hold up shutdown
+        if self._thread:
+            self._stop.set()
+            self._thread = None
+    
+    def _run(self, stop):
+        while not stop.is_set():
+            self.probe()
+            stop.wait(self.interval)
+
+
+class HighFrequencySampler:
+    # Samples cheap counters rate times a second into a ring buffer on a
+    # background thread; aggregate() condenses everything buffered since
+    # the previous call into one row per metric, so short bursts show up
+    # in the max/p99 without storing every sample.
+    
+    def __init__(self, read_cpu_times, read_memory, rate=10, buffer_seconds=600):
+        self.rate = rate
+        self.read_memory = read_memory
+        self.cpu_sampler = CpuSampler(min_interval=1 / rate, read_times=read_cpu_times)
+        # Oldest samples are dropped if aggregate() isn't called in time
+        self._buffer = deque(maxlen=max(1, int(rate * buffer_seconds)))
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='syspulse-highfreq', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(1)
+            self._thread = None
+    
+    def _run(self):
+        period = 1 / self.rate
+        next_sample = time.monotonic() + period
+        while not self._stop.wait(max(0, next_sample - time.monotonic())):
+            self.sample()
+            # Fixed-rate deadlines; a stall skips samples rather than
+            # bunching them up
+            next_sample += period
+            if next_sample < time.monotonic():
+                next_sample = time.monotonic() + period
+    
+    def sample(self):
+        cpu, cpu_cores = self.cpu_sampler.sample_all()
+        memory_percent = self.read_memory()[2]
+        values = (cpu, max(cpu_cores) if cpu_cores else None, memory_percent)
+        with self._lock:
+            self._buffer.append(values)
+    
+    def aggregate(self):
+        with self._lock:
+            samples = list(self._buffer)
+            self._buffer.clear()
+        
+        rows = []
+        for metric, values in zip(HIGHFREQ_METRICS, zip(*samples)):
+            values = [value for value in values if value is not None]
+            if not values:
+                continue
+            
+            ordered = sorted(values)
+            rows.append({
+                'metric': metric,
+                'samples': len(values),
+                'value_mean': round(sum(values) / len(values), 2),
+                'value_min': round(ordered[0], 2),
+                'value_max': round(ordered[-1], 2),
+                'value_p99': round(percentile(ordered, 99), 2),
+                'value_last': round(values[-1], 2)
+            })
+        
+        return rows
+
+
+class CounterRates:
+    
+    def __init__(self, read_counters, fields):
+        self.read_counters = read_counters
+        self.fields = fields
+        self._previous = (read_counters(), time.monotonic())
+    
+    def sample(self):
+        current, now = self.read_counters(), time.monotonic()
+        previous, previous_at = self._previous
+        self._previous = (current, now)
+        
+        elapsed = now - previous_at
+        if elapsed <= 0:
+            return dict.fromkeys(self.fields)
+        
+        totals = dict.fromkeys(self.fields, 0)
+        for device, counters in current.items():
+            before = previous.get(device)
+            if before is None:
+                # New device: no baseline until the next sample
+                continue
+            for metric, field in self.fields.items():
+                totals[metric] += counter_delta(getattr(before, field), getattr(counters, field))
+        
+        return {metric: round(total / elapsed, 2) for metric, total in totals.items()}
+
+
+class MountMonitor:
+    
+    def __init__(self, mounts=None, fstypes_exclude=DEFAULT_MOUNT_FSTYPES_EXCLUDE, timeout=2):
+        self.mounts = list(mounts or [])
+        self.fstypes_exclude = set(fstypes_exclude)
+        self.timeout = timeout
+        self._hung = {}
+    
+    def discover(self):
+        partitions = [
+            part for part in psutil.disk_partitions(all=False)
+            if part.fstype not in self.fstypes_exclude
+        ]
+        if not self.mounts:
+            return [(part.mountpoint, part.device, part.fstype) for part in partitions]
+        
+        known = {part.mountpoint: part for part in partitions}
+        return [
+            (mount, known[mount].device, known[mount].fstype) if mount in known else (mount, '', '')
+            for mount in self.mounts
+        ]
+    
+    def sample(self):
+        now = time.monotonic()
+        results = {}
+        workers = {}
+        for mountpoint, device, fstype in self.discover():
+            hung = self._hung.get(mountpoint)
+            if hung is not None and hung.is_alive():
+                # Still stuck in an earlier statvfs: don't wait for it again
+                # or pile up more threads behind it
+                workers[mountpoint] = (device, fstype, hung, False)
+                continue
+            self._hung.pop(mountpoint, None)
+            
+            worker = threading.Thread(
+                target=self._stat_mount, args=(mountpoint, results),
+                name='syspulse-statvfs', daemon=True
+            )
+            worker.start()
+            workers[mountpoint] = (device, fstype, worker, True)
+        
+        deadline = now + self.timeout
+        rows = []
+        for mountpoint, (device, fstype, worker, started) in workers.items():
+            if started:
+                worker.join(max(0, deadline - time.monotonic()))
+            usage = results.get(mountpoint)
+            
+            if worker.is_alive():
+                self._hung[mountpoint] = worker
+            
+            rows.append({
+                'mountpoint': mountpoint,
+                'device': device,
+                'fstype': fstype,
+                'total_gb': round(usage.total / GB, 2) if usage else None,
+                'used_gb': round(usage.used / GB, 2) if usage else None,
+                'percent': round(usage.percent, 2) if usage else None,
+                'responsive': int(usage is not None)
+            })
+        
+        return rows
+    
+    def _stat_mount(self, mountpoint, results):
+        try:
+            results[mountpoint] = psutil.disk_usage(mountpoint)
+        except OSError:
+            pass
+
+
+class ProcessSampler:
+    
+    def __init__(self, top_n=5):
+        self.top_n = top_n
+        self._table = {}
+        self._last_sample = None
+    
+    def sample(self):
+        # Only pids() is listed each time; psutil.Process objects and their
+        # last counters are kept across samples, so each process costs one
+        # cpu_times/memory_info read.
+        now = time.monotonic()
+        elapsed = now - self._last_sample if self._last_sample is not None else None
+        self._last_sample = now
+        
+        previous = self._table
+        table = {}
+        usage = []
+        
+        for pid in psutil.pids():
+            entry = previous.get(pid)
+            if entry is None:
+                entry = self._track(pid)
+                if entry is None:
+                    continue
+            
+            process, name, cpu_before, rss_before = entry
+            try:
+                with process.oneshot():
+                    times = process.cpu_times()
+                    rss = process.memory_info().rss
+                # psutil doesn't re-check identity for these reads and
+                # caches create_time(); is_running() compares it against a
+                # fresh read, so a reused pid isn't ranked under the old name
+                reused = cpu_before is not None and not process.is_running()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            
+            if reused:
+                entry = self._track(pid)
+                if entry is None:
+                    continue
+                process, name = entry[:2]
+                cpu_before = rss_before = None
+            
+            cpu_total = times.user + times.system
+            table[pid] = (process, name, cpu_total, rss)
+            
+            # New processes, and reused pids whose counters went backwards,
+            # need a baseline before they can be ranked.
+            if elapsed and cpu_before is not None and cpu_total >= cpu_before:
+                usage.append((cpu_total - cpu_before, pid, name, rss, rss - rss_before))
+        
+        self._table = table
+        
+        if not elapsed:
+            return []
+        
+        usage.sort(reverse=True)
+        return [
+            {
+                'pid': pid,
+                'name': name,
+                'cpu_percent': round(cpu / elapsed * 100, 2),
+                'rss_mb': round(rss / 1024 ** 2, 2),
+                'rss_delta_mb': round(rss_delta / 1024 ** 2, 2)
+            }
+            for cpu, pid, name, rss, rss_delta in usage[:self.top_n]
+        ]
+    
+    def _track(self, pid):
+        try:
+            process = psutil.Process(pid)
+            return process, process.name(), None, None
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+
+
+class CgroupReader:
+    
+    def __init__(self, cgroup_path=None, cgroup_root='/sys/fs/cgroup',
+                 pressure_root='/proc/pressure', self_cgroup='/proc/self/cgroup'):
+        self.path = cgroup_path or self._find_cgroup(cgroup_root, self_cgroup)
+        self.pressure_root = pressure_root
+        self._previous = None
+    
+    def _find_cgroup(self, cgroup_root, self_cgroup):
+        # Only the unified (v2) hierarchy is supported
+        if not os.path.exists(os.path.join(cgroup_root, 'cgroup.controllers')):
+            return None
+        
+        try:
+            with open(self_cgroup) as f:
+                for line in f:
+                    if line.startswith('0::'):
+                        path = os.path.join(cgroup_root, line[3:].strip().lstrip('/'))
+                        if os.path.isdir(path):
+                            return path
+        except OSError:
+            pass
+        
+        # Inside a container the namespace root is our own cgroup
+        return cgroup_root
+    
+    def sample(self):
+        stats = self._memory()
+        stats.update(self._throttling())
+        stats.update(self._pressure())
+        return stats
+    
+    def _read(self, name):
+        if self.path is None:
+            return None
+        try:
+            with open(os.path.join(self.path, name)) as f:
+                return f.read()
+        except OSError:
+            return None
+    
+    def _memory(self):
+        current = self._read('memory.current')
+        limit = self._read('memory.max')
+        
+        used = int(current) if current else None
+        limit = int(limit) if limit and limit.strip() != 'max' else None
+        
+        return {
+            'cgroup_memory_used_gb': round(used / GB, 2) if used is not None else None,
+            'cgroup_memory_limit_gb': round(limit / GB, 2) if limit else None,
+            'cgroup_memory_percent': round(used / limit * 100, 2) if used is not None and limit else None
+        }
+    
+    def _throttling(self):
+        empty = {'cgroup_cpu_throttled_percent': None, 'cgroup_cpu_throttled_ms_per_s': None}
+        
+        data = self._read('cpu.stat')
+        if not data:
+            return empty
+        
+        counters = dict(line.split() for line in data.splitlines() if line.strip())
+        if 'nr_periods' not in counters:
+            # No CPU quota configured, so nothing is ever throttled
+            return empty
+        
+        current = (
+            int(counters['nr_periods']), int(counters['nr_throttled']),
+            int(counters['throttled_usec']), time.monotonic()
+        )
+        previous, self._previous = self._previous, current
+        if previous is None:
+            return empty
+        
+        periods = current[0] - previous[0]
+        elapsed = current[3] - previous[3]
+        return {
+            'cgroup_cpu_throttled_percent':
+                round((current[1] - previous[1]) / periods * 100, 2) if periods > 0 else 0.0,
+            'cgroup_cpu_throttled_ms_per_s':
+                round((current[2] - previous[2]) / 1000 / elapsed, 2) if elapsed > 0 else None
+        }
+    
+    def _pressure(self):
+        # avg10 share of wall time in which some (or all) tasks stalled
+        stats = {}
+        for resource in PRESSURE_RESOURCES:
+            values = {}
+            try:
+                with open(os.path.join(self.pressure_root, resource)) as f:
+                    for line in f:
+                        kind, avg10 = line.split()[:2]
+                        values[kind] = float(avg10.split('=')[1])
+            except (OSError, ValueError, IndexError):
+                pass
+            
+            stats[f"psi_{resource}_some"] = values.get('some')
+            if resource != 'cpu':
+                stats[f"psi_{resource}_full"] = values.get('full')
+        
+        return stats
+
+
+class HostFacts:
+    
+    def __init__(self, disk_path='/', check_interval=300):
+        self.disk_path = disk_path
+        self.check_interval = check_interval
+        self.refresh()
+    
+    def refresh(self):
+        self.boot_time = psutil.boot_time()
+        self.memory_total = psutil.virtual_memory().total
+        self.memory_total_gb = round(self.memory_total / GB, 2)
+        self.disk_total = psutil.disk_usage(self.disk_path).total
+        self.disk_total_gb = round(self.disk_total / GB, 2)
+        self.disk_device = os.stat(self.disk_path).st_dev
+        self._checked_at = time.monotonic()
+    
+    def validate(self, memory_total=None, disk_total=None):
+        # Totals arrive with the volatile counters anyway, so a resize or
+        # hotplug is caught on the next sample; a reboot-time adjustment or
+        # something mounted over disk_path is only checked periodically.
+        if ((memory_total is not None and memory_total != self.memory_total)
+                or (disk_total is not None and disk_total != self.disk_total)):
+            self.refresh()
+            return True
+        
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return False
+        
+        if (psutil.boot_time() != self.boot_time
+                or os.stat(self.disk_path).st_dev != self.disk_device):
+            self.refresh()
+            return True
+        
+        self._checked_at = time.monotonic()
+        return False
+
+
+class MetricSource:
+    
+    def __init__(self, name, collect, interval=0, rows=(), blocking=False):
+        self.name = name
+        self.collect = collect
+        self.interval = interval
+        # Keys holding child-table rows, recorded only when the source ran
+        self.rows = set(rows)
+        # Blocking sources (syscalls that can hang, network I/O) run on the
+        # collector's worker pool; the rest run inline
+        self.blocking = blocking
+        self.values = None
+        self.last_run = None
+        # Exception raised by the latest completed run, if it failed
+        self.error = None
+        self._fresh = False
+        self._future = None
+    
+    @property
+    def stale(self):
+        # Still running past the cycle deadline, or its last run failed
+        return self._future is not None or self.error is not None
+    
+    def is_due(self, now):
+        # Ticks rarely land exactly on the interval, so allow some slack
+        # instead of pushing the run out by a whole tick
+        return self.last_run is None or now - self.last_run >= self.interval - SCHEDULE_SLACK
+    
+    def start(self, now, executor=None):
+        # Returns the pending future, or None when the source ran inline
+        self.last_run = now
+        if executor is None or not self.blocking:
+            try:
+                self._finish(self.collect())
+            except Exception as e:
+                self.error = e
+            return None
+        
+        # A run still in flight from an earlier cycle is not started again
+        if self._future is None:
+            self._future = executor.submit(self.collect)
+        return self._future
+    
+    def poll(self):
+        if self._future is not None and self._future.done():
+            future, self._future = self._future, None
+            try:
+                self._finish(future.result())
+            except Exception as e:
+                # One broken source must not take the whole sample down
+                self.error = e
+        
+        values = self.values or {}
+        if not self._fresh:
+            values = {key: value for key, value in values.items() if key not in self.rows}
+        self._fresh = False
+        return values
+    
+    def _finish(self, values):
+        self.values = values
+        self.error = None
+        self._fresh = True
+
+
 class StatsCollector:
     
-    def __init__(self, ping_host='8.8.8.8', ping_port=53):
+    def __init__(self, ping_host='8.8.8.8', ping_port=53, latency_interval=15, latency_timeout=5,
+                 ping_targets=None, probes_per_target=3, facts_check_interval=300,
+                 mounts=None, mount_fstypes_exclude=DEFAULT_MOUNT_FSTYPES_EXCLUDE,
+                 mount_refresh_interval=300, mount_timeout=2, top_processes=5,
+                 process_interval=60, cgroup_path=None, cgroup_root='/sys/fs/cgroup',
+                 pressure_root='/proc/pressure', source_intervals=None,
+                 source_workers=4, source_deadline=2, highfreq_rate=0,
+                 highfreq_buffer_seconds=600):
         self.ping_host = ping_host
         self.ping_port = ping_port
+        self.cpu_sampler = CpuSampler(read_times=self.read_cpu_times)
+        self.host_facts = HostFacts(check_interval=facts_check_interval)
+        self.disk_rates = CounterRates(read_disk_counters, DISK_RATE_FIELDS)
+        self.net_rates = CounterRates(read_net_counters, NET_RATE_FIELDS)
+        self.mount_monitor = MountMonitor(mounts, mount_fstypes_exclude, mount_timeout)
+        self.process_sampler = ProcessSampler(top_processes)
+        self.cgroup_reader = CgroupReader(cgroup_path, cgroup_root, pressure_root)
+        self.latency_prober = LatencyProber(
+            ping_targets or [(ping_host, ping_port)],
+            latency_interval, latency_timeout, probes_per_target
+        )
+        
+        self.source_intervals = dict(DEFAULT_SOURCE_INTERVALS)
+        self.source_intervals.update({
+            'latency': latency_interval,
+            'mounts': mount_refresh_interval,
+            'processes': process_interval
+        })
+        self.source_intervals.update(source_intervals or {})
+        
+        self.source_deadline = source_deadline
+        self.executor = None
+        if source_workers > 0:
+            self.executor = ThreadPoolExecutor(source_workers, thread_name_prefix='syspulse-source')
+        
+        self.sources = {}
+        self.register_source('cpu', self._collect_cpu)
+        self.register_source('memory', self._collect_memory)
+        self.register_source('disk', self._collect_disk, blocking=True)
+        self.register_source('uptime', self._collect_uptime)
+        self.register_source('latency', self._collect_latency, rows=('latency_targets',),
+                             blocking=True)
+        self.register_source('io', self._collect_io)
+        self.register_source('cgroup', self.cgroup_reader.sample)
+        self.register_source('mounts', self._collect_mounts, rows=('mounts',), blocking=True)
+        if top_processes > 0:
+            self.register_source('processes', self._collect_processes, rows=('top_processes',),
+                                 blocking=True)
+        
+        self.highfreq_sampler = None
+        if highfreq_rate > 0:
+            self.highfreq_sampler = HighFrequencySampler(
+                self.read_cpu_times, self.read_memory, highfreq_rate, highfreq_buffer_seconds
+            )
+            self.register_source('highfreq', self._collect_highfreq, rows=('highfreq',))
+    
+    def register_source(self, name, collect, interval=None, rows=(), blocking=False):
+        # collect() returns a dict merged into each sample; an interval
+        # configured under [sources] wins over the one given here
+        interval = self.source_intervals.get(name, interval or 0)
+        source = MetricSource(name, collect, interval, rows, blocking)
+        self.sources[name] = source
+        return source
+    
+    def start_background_probes(self):
+        self.latency_prober.start()
+        if self.highfreq_sampler:
+            self.highfreq_sampler.start()
     
-    def get_cpu_percent(self, interval=1):
-        return psutil.cpu_percent(interval=interval)
+    def close(self):
+        self.latency_prober.stop()
+        if self.highfreq_sampler:
+            self.highfreq_sampler.stop()
+        if self.executor is not None:
+            # Don't wait on a source stuck in a hung syscall
+            self.executor.shutdown(wait=False, cancel_futures=True)
+    
+    def read_cpu_times(self):
+        return read_psutil_cpu_times()
+    
+    def read_memory(self):
+        mem = psutil.virtual_memory()
+        return mem.total, mem.used, mem.percent
+    
+    def read_uptime(self, now):
+        return now - self.host_facts.boot_time
+    
+    def get_cpu_percent(self, interval=None):
+        if interval:
+            return psutil.cpu_percent(interval=interval)
+        return self.cpu_sampler.sample()
     
     def get_memory_usage(self):
         mem = psutil.virtual_memory()
         return {
             'percent': mem.percent,
-            'used_gb': mem.used / (1024 ** 3),
-            'total_gb': mem.total / (1024 ** 3)
+            'used_gb': mem.used / GB,
+            'total_gb': mem.total / GB
         }
     
     def get_disk_usage(self, path='/'):
         disk = psutil.disk_usage(path)
         return {
             'percent': disk.percent,
-            'used_gb': disk.used / (1024 ** 3),
-            'total_gb': disk.total / (1024 ** 3)
+            'used_gb': disk.used / GB,
+            'total_gb': disk.total / GB
         }
     
     def get_uptime_seconds(self):
         boot_time = psutil.boot_time()
         return time.time() - boot_time
     
+    def get_latency_results(self):
+        # Reads the background prober's cached results when it is running,
+        # otherwise probes inline (one-shot collection).
+        if self.latency_prober.running:
+            return self.latency_prober.latest()
+        return self.latency_prober.probe(), 0.0
+    
     def get_network_latency(self):
-        try:
-            start = time.time()
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(5)
-            sock.connect((self.ping_host, self.ping_port))
-            sock.close()
-            latency_ms = (time.time() - start) * 1000
-            return round(latency_ms, 2)
-        except (socket.timeout, socket.error):
-            return None
+        # The first target is the primary one recorded on every sample
+        results, age = self.get_latency_results()
+        return (results[0]['p50_ms'] if results else None), age
     
-    def collect_all(self):
-        cpu = self.get_cpu_percent(interval=0.5)
-        memory = self.get_memory_usage()
-        disk = self.get_disk_usage()
-        uptime = self.get_uptime_seconds()
-        latency = self.get_network_latency()
-        
+    def _collect_cpu(self):
+        cpu, cpu_cores = self.cpu_sampler.sample_all()
         return {
-            'timestamp': datetime.now().isoformat(),
             'cpu_percent': round(cpu, 2),
-            'memory_percent': round(memory['percent'], 2),
-            'memory_used_gb': round(memory['used_gb'], 2),
-            'memory_total_gb': round(memory['total_gb'], 2),
-            'disk_percent': round(disk['percent'], 2),
-            'disk_used_gb': round(disk['used_gb'], 2),
-            'disk_total_gb': round(disk['total_gb'], 2),
-            'uptime_seconds': int(uptime),
-            'network_latency_ms': latency
+            'cpu_core_max': round(max(cpu_cores), 2) if cpu_cores else None,
+            'cpu_per_core': cpu_cores
+        }
+    
+    def _collect_memory(self):
+        # Static host facts are cached; only volatile counters are read here
+        memory_total, memory_used, memory_percent = self.read_memory()
+        self.host_facts.validate(memory_total=memory_total)
+        return {
+            'memory_percent': round(memory_percent, 2),
+            'memory_used_gb': round(memory_used / GB, 2),
+            'memory_total_gb': self.host_facts.memory_total_gb
         }
+    
+    def _collect_disk(self):
+        disk = psutil.disk_usage(self.host_facts.disk_path)
+        self.host_facts.validate(disk_total=disk.total)
+        return {
+            'disk_percent': round(disk.percent, 2),
+            'disk_used_gb': round(disk.used / GB, 2),
+            'disk_total_gb': self.host_facts.disk_total_gb
+        }
+    
+    def _collect_uptime(self):
+        return {'uptime_seconds': int(self.read_uptime(time.time()))}
+    
+    def _collect_latency(self):
+        latency_results, latency_age = self.get_latency_results()
+        return {
+            'network_latency_ms': latency_results[0]['p50_ms'] if latency_results else None,
+            'network_latency_age_s': latency_age,
+            'latency_targets': latency_results
+        }
+    
+    def _collect_io(self):
+        stats = self.disk_rates.sample()
+        stats.update(self.net_rates.sample())
+        return stats
+    
+    def _collect_mounts(self):
+        return {'mounts': self.mount_monitor.sample()}
+    
+    def _collect_processes(self):
+        # The first run only builds the process table
+        processes = self.process_sampler.sample()
+        return {'top_processes': processes} if processes else {}
+    
+    def _collect_highfreq(self):
+        # One row per metric covering every buffered sample since the
+        # previous run; empty unless the background sampler is running
+        rows = self.highfreq_sampler.aggregate()
+        return {'highfreq': rows} if rows else {}
+    
+    def collect_all(self):
+        # Only sources that are due run; the others repeat their last
+        # values so every sample is a complete row. Blocking sources run
+        # concurrently with the inline ones, and any still running at the
+        # deadline are marked stale and keep their last values, so a cycle
+        # takes as long as its slowest source, capped at the deadline.
+        now = time.monotonic()
+        stats = {'timestamp': int(time.time() * 1000)}
+        
+        pending = []
+        for source in self.sources.values():
+            if source.is_due(now):
+                future = source.start(now, self.executor)
+                if future is not None:
+                    pending.append((source, future))
+        
+        # A source that never finished has nothing to fall back on
+        wait([future for source, future in pending if source.values is None])
+        wait([future for source, future in pending],
+             timeout=max(0, now + self.source_deadline - time.monotonic()))
+        
+        stale = []
+        for source in self.sources.values():
+            stats.update(source.poll())
+            if source.stale:
+                stale.append(source.name)
+        stats['stale_sources'] = ','.join(stale) or None
+        
+        return stats
+
+
+class ProcfsCollector(StatsCollector):
+    # Linux fast path: /proc files are opened once and re-read with
+    # os.pread, skipping psutil's generic wrappers and namedtuples.
+    
+    PROC_FILES = ('stat', 'meminfo', 'uptime')
+    
+    def __init__(self, *args, proc_root='/proc', **kwargs):
+        self._fds = {}
+        try:
+            for name in self.PROC_FILES:
+                self._fds[name] = os.open(os.path.join(proc_root, name), os.O_RDONLY)
+        except OSError:
+            self._close_fds()
+            raise
+        
+        # Enough for every cpu line; the interrupt counters that follow
+        # can be far larger and are never needed.
+        self._stat_size = 256 * ((os.cpu_count() or 1) + 1)
+        
+        super().__init__(*args, **kwargs)
+    
+    def close(self):
+        super().close()
+        self._close_fds()
+    
+    def _close_fds(self):
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds = {}
+    
+    def read_cpu_times(self):
+        # Leading "cpu" / "cpuN" lines: user nice system idle iowait irq
+        # softirq steal guest guest_nice; guest is already in user/nice.
+        data = os.pread(self._fds['stat'], self._stat_size, 0)
+        times = []
+        for line in data.split(b'\n'):
+            if not line.startswith(b'cpu'):
+                break
+            values = [int(value) for value in line.split()[1:9]]
+            times.append((sum(values), values[3] + values[4]))
+        return times
+    
+    def read_memory(self):
+        data = os.pread(self._fds['meminfo'], 8192, 0)
+        total, free, available, buffers, cached, reclaimable = (
+            self._meminfo_bytes(data, key) for key in MEMINFO_KEYS
+        )
+        
+        # Match psutil.virtual_memory() on Linux so switching backends
+        # doesn't change the stored series: psutil 7.1+ reports total -
+        # available, older releases subtract free, buffers and page cache
+        if PSUTIL_USED_IS_AVAILABLE:
+            used = total - available
+        else:
+            used = total - free - buffers - cached - reclaimable
+            if used < 0:
+                used = total - free
+        percent = round((total - available) / total * 100, 1) if total else 0.0
+        
+        return total, used, percent
+    
+    def _meminfo_bytes(self, data, key):
+        start = data.find(key)
+        if start < 0:
+            return 0
+        start += len(key)
+        return int(data[start:data.index(b'kB', start)]) * 1024
+    
+    def read_uptime(self, now):
+        data = os.pread(self._fds['uptime'], 64, 0)
+        return float(data[:data.index(b' ')])
+
+
+def create_collector(backend='auto', **kwargs):
+    if backend not in COLLECTOR_BACKENDS:
+        raise ValueError(f"Unknown collector backend: {backend}")
+    
+    if backend != 'psutil' and sys.platform.startswith('linux'):
+        try:
+            return ProcfsCollector(**kwargs)
+        except OSError:
+            # /proc is not mounted or readable (e.g. a sandbox)
+            pass
+    
+    return StatsCollector(**kwargs)
 
 
 if __name__ == '__main__':
-    collector = StatsCollector()
+    collector = create_collector()
     stats = collector.collect_all()
     
     print("System Statistics:")
-    print(f"Timestamp: {stats['timestamp']}")
-    print(f"CPU: {stats['cpu_percent']}%")
+    print(f"Timestamp: {datetime.fromtimestamp(stats['timestamp'] / 1000).isoformat()}")
+    print(f"CPU: {stats['cpu_percent']}% (busiest core: {stats['cpu_core_max']}%, "
+          f"{len(stats['cpu_per_core'])} cores)")
     print(f"Memory: {stats['memory_percent']}% ({stats['memory_used_gb']:.2f}GB / {stats['memory_total_gb']:.2f}GB)")
     print(f"Disk: {stats['disk_percent']}% ({stats['disk_used_gb']:.2f}GB / {stats['disk_total_gb']:.2f}GB)")
     print(f"Uptime: {stats['uptime_seconds']}s")
+    print(f"Disk I/O: {stats['disk_read_iops']} r/s, {stats['disk_write_iops']} w/s, "
+          f"{stats['disk_read_bps'] / 1e6:.2f}MB/s read, {stats['disk_write_bps'] / 1e6:.2f}MB/s written")
+    print(f"Network: {stats['net_recv_bps'] / 1e6:.2f}MB/s in, {stats['net_sent_bps'] / 1e6:.2f}MB/s out")
+    if stats['cgroup_memory_used_gb'] is not None:
+        limit = f"{stats['cgroup_memory_limit_gb']:.2f}GB" if stats['cgroup_memory_limit_gb'] else "no limit"
+        print(f"cgroup Memory: {stats['cgroup_memory_used_gb']:.2f}GB / {limit}")
+    print(f"Pressure (avg10): cpu {stats['psi_cpu_some']}, memory {stats['psi_memory_some']}, "
+          f"io {stats['psi_io_some']}")
+    for mount in stats.get('mounts', []):
+        if mount['responsive']:
+            print(f"  {mount['mountpoint']}: {mount['percent']}% "
+                  f"({mount['used_gb']:.2f}GB / {mount['total_gb']:.2f}GB)")
+        else:
+            print(f"  {mount['mountpoint']}: not responding")
     print(f"Network Latency: {stats['network_latency_ms']}ms" if stats['network_latency_ms'] else "Network Latency: N/A")
+    for result in stats['latency_targets']:
+        print(f"  {result['target']}: p50 {result['p50_ms']}ms, p95 {result['p95_ms']}ms, "
+              f"loss {result['loss_rate']:.0%}")